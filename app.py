@@ -1,15 +1,32 @@
+from src.utils.startup import mark_first_render, mark_script_start
+mark_script_start()
 import streamlit as st
-import pandas as pd
 import os
+import sqlite3
+import time
 from src.config.constants import (
+    CONCURRENCY_OPTIONS,
     DEFAULT_BATCH_SIZE,
     DEFAULT_SEPARATOR,
+    GEMINI_MODEL_NAME,
+    LIVE_DASHBOARD_INTERVAL,
     SEPARATOR_OPTIONS,
-    STATIC_DIR
+    STATIC_DIR,
+    TXT_PREVIEW_RECORDS
 )
-from src.utils.privacy import mask_ids
+from src.utils.preprocessing import mask_texts
 from src.utils.file_processing import process_file
-from src.visualization.dashboard import create_dashboard
+from src.utils.job_control import start_job, cancel_job, show_cancel_notice
+from src.utils.metrics import get_session_metrics
+from src.visualization.performance_panel import render_metrics_panel
+from src.utils.profiling import profile_run, profile_stage
+from src.utils.estimator import estimate_tokens, estimate_run
+from src.visualization.dashboard import DashboardAggregates, build_dashboard, create_dashboard
+from src.utils.results import set_results, get_artifact, to_csv_bytes, memory_bytes, session_memory_report
+from src.utils.results_db import list_runs_for_categories, save_run
+from src.utils.incremental import labels_from_export, labels_from_run
+from src.utils.text_records import read_records, record_stats
+from src.visualization.results_table import DataFrameSource, get_source, render_results_table
 
 def setup_page_config():
     """Configure page settings and styling"""
@@ -34,8 +51,97 @@ def setup_page_config():
         </style>
     """, unsafe_allow_html=True)
 
+def get_text_tokens(cache_key, texts):
+    """Per-text token estimates, cached per file and column/separator"""
+    cached = st.session_state.get("text_tokens_cache")
+    if not cached or cached[0] != cache_key:
+        cached = (cache_key, [estimate_tokens(text) for text in texts])
+        st.session_state.text_tokens_cache = cached
+    return cached[1]
+
+def get_txt_stats(cache_key, file, separator):
+    """Record count, mean length and per-record token estimates of a TXT upload, cached per file and separator
+
+    Tokens are estimated on masked records, as for CSV uploads.
+    """
+    cached = st.session_state.get("txt_stats_cache")
+    if not cached or cached[0] != cache_key:
+        cached = (cache_key, record_stats(file, separator, estimate_tokens, prepare=mask_texts))
+        st.session_state.txt_stats_cache = cached
+    return cached[1]
+
+def render_incremental_options(categories, text_column):
+    """Optional earlier run to reuse labels from: ("export", file, text_column), ("run", run_id) or None"""
+    with st.expander("🔁 تشغيل تزايدي (تصنيف الصفوف الجديدة فقط)"):
+        mode = st.radio(
+            "مصدر النتائج السابقة",
+            options=["none", "export", "run"],
+            format_func={"none": "بدون", "export": "ملف نتائج سابق (CSV)", "run": "تشغيل محفوظ في السجل"}.get,
+            horizontal=True
+        )
+        if mode == "export":
+            previous_file = st.file_uploader("ملف النتائج السابق", type=["csv"], key="previous_results_file")
+            st.caption(f"يجب أن يحتوي الملف على العمودين '{text_column}' و'classification' كما في ملف التحميل")
+            return ("export", previous_file, text_column) if previous_file else None
+        if mode == "run":
+            if not categories:
+                st.caption("أدخل الفئات أولاً لعرض التشغيلات المحفوظة بنفس الفئات")
+                return None
+            try:
+                runs = list_runs_for_categories(categories)
+            except sqlite3.Error as e:
+                st.warning(f"تعذر قراءة السجل: {str(e)}")
+                return None
+            if not runs:
+                st.caption("لا توجد تشغيلات محفوظة بنفس الفئات")
+                return None
+            run = st.selectbox(
+                "التشغيل السابق",
+                options=runs,
+                format_func=lambda r: f"#{r['run_id']} - {r['source_name'] or ''} ({r['row_count']:,} صف) - "
+                                      f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(r['created_at']))}"
+            )
+            return ("run", run["run_id"])
+    return None
+
+def load_previous_labels(previous_source):
+    """{row_hash: label} for the chosen earlier run, or None"""
+    if previous_source is None:
+        return None
+    if previous_source[0] == "export":
+        _, previous_file, text_column = previous_source
+        previous_file.seek(0)
+        return labels_from_export(previous_file, text_column)
+    return labels_from_run(previous_source[1])
+
+def render_preflight_estimate(text_tokens, categories, batch_size, max_workers):
+    """Show expected batches, tokens and wall time before the run starts"""
+    estimate = estimate_run(text_tokens, categories, batch_size)
+    with st.expander("🧮 التقدير المسبق للتكلفة والمدة", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        col1.metric("عدد الطلبات", f"{estimate['batches']:,}")
+        col2.metric("رموز الإدخال", f"{estimate['input_tokens']:,}")
+        col3.metric("رموز الإخراج", f"{estimate['output_tokens']:,}")
+
+        rows = [
+            {
+                "الطلبات المتزامنة": f"{workers} ✅" if workers == max_workers else str(workers),
+                "المدة المتوقعة": f"{seconds / 60:.1f} دقيقة" if seconds >= 60 else f"{seconds:.0f} ثانية",
+            }
+            for workers, seconds in estimate["wall_time_s"].items()
+        ]
+        st.table(rows)
+        if estimate["history_samples"]:
+            st.caption(f"مبني على زمن {estimate['history_samples']:,} طلب سابق")
+        else:
+            st.caption("تقدير افتراضي؛ سيتحسن بعد أول تشغيل")
+
 def main():
     setup_page_config()
+    show_cancel_notice()
+    metrics = get_session_metrics()
+    metrics_slot = st.sidebar.empty()
+    render_metrics_panel(metrics, metrics_slot)
     
     st.title("📜 مصنف النصوص العربية")
     st.write("قم برفع ملفك وتحديد الفئات لتصنيف النصوص تلقائياً.")
@@ -55,19 +161,26 @@ def main():
             st.subheader("📄 معاينة الملف")
             column = None
             separator = DEFAULT_SEPARATOR
+            estimate_texts = []
+            text_tokens = None
+            file_key = getattr(uploaded_file, "file_id", uploaded_file.name)
             
             if file_type == "CSV":
-                df_preview = pd.read_csv(uploaded_file)
+                import pandas as pd
+                with profile_stage("csv_parse"):
+                    df_preview = pd.read_csv(uploaded_file)
                 if not df_preview.empty and len(df_preview.columns) > 0:
                     column = st.selectbox("اختر العمود المراد تصنيفه:", df_preview.columns)
                     
                     if column:
                         # Store original texts and create masked version
                         original_texts = df_preview[column].tolist()
-                        masked_texts = [mask_ids(text) for text in original_texts]
+                        with profile_stage("masking"):
+                            masked_texts = mask_texts(original_texts)
                         
                         # Check if any masking was applied
                         was_masked = any(orig != masked for orig, masked in zip(original_texts, masked_texts))
+                        estimate_texts = masked_texts
                         
                         if was_masked:
                             st.markdown("### النص الأصلي")
@@ -97,14 +210,15 @@ def main():
                     st.error("ملف CSV فارغ أو لا يحتوي على أعمدة.")
                     return
             else:
-                content = uploaded_file.getvalue().decode('utf-8')
-                if content.strip():
-                    # Split content and create masked version
-                    texts = [text.strip() for text in content.split(separator) if text.strip()]
-                    masked_texts = [mask_ids(text) for text in texts]
+                # Only the first records are read for the preview; the rest stay unread
+                texts = read_records(uploaded_file, separator, TXT_PREVIEW_RECORDS)
+                if texts:
+                    with profile_stage("masking"):
+                        masked_texts = mask_texts(texts)
                     
                     # Check if any masking was applied
                     was_masked = any(orig != masked for orig, masked in zip(texts, masked_texts))
+                    content = separator.join(texts)
                     
                     if was_masked:
                         st.markdown("### النص الأصلي")
@@ -148,10 +262,11 @@ def main():
                             display_separator = "↵" if separator == "\n" else separator
                             st.markdown(f"<div class='separator-preview'>الفاصل المختار: \"{display_separator}\"</div>", unsafe_allow_html=True)
 
-                    # Recalculate texts based on current separator
-                    current_texts = [text.strip() for text in content.split(separator) if text.strip()]
-                    total_texts = len(current_texts)
-                    avg_length = sum(len(text) for text in current_texts) / total_texts if total_texts > 0 else 0
+                    # Recalculate stats based on current separator, streaming over the file once
+                    stats = get_txt_stats((file_key, separator), uploaded_file, separator)
+                    total_texts = stats["count"]
+                    avg_length = stats["avg_length"]
+                    text_tokens = stats["measured"]
                     
                     st.markdown(f"""
                     <div style='background-color: #f1f5f9; padding: 0.7rem; border-radius: 8px; margin: 0.5rem 0;'>
@@ -187,6 +302,19 @@ def main():
                     value=DEFAULT_BATCH_SIZE,
                     help="عدد النصوص التي سيتم معالجتها في كل طلب"
                 )
+                max_workers = st.selectbox(
+                    "الطلبات المتزامنة",
+                    options=CONCURRENCY_OPTIONS,
+                    index=0,
+                    help="عدد الدفعات التي تُرسل إلى النموذج في الوقت نفسه"
+                )
+
+            previous_source = render_incremental_options(categories, column if file_type == "CSV" else "text")
+
+            if estimate_texts:
+                text_tokens = get_text_tokens((file_key, column, separator), estimate_texts)
+            if categories and text_tokens:
+                render_preflight_estimate(text_tokens, categories, batch_size, max_workers)
 
             if 'classification_results' not in st.session_state:
                 st.session_state.classification_results = None
@@ -196,22 +324,67 @@ def main():
                     st.toast("يجب إدخال فئة واحدة على الأقل ⚠️", icon="⚠️")
                 else:
                     uploaded_file.seek(0)
-                    results, was_masked = process_file(uploaded_file, file_type, categories, batch_size, column, separator)
-                    st.session_state.classification_results = results
+                    previous_labels = load_previous_labels(previous_source)
+                    control = start_job("classification_job", metrics=metrics)
+                    st.button("⏹️ إيقاف التصنيف", on_click=cancel_job, args=("classification_job",), use_container_width=True)
+                    aggregates = DashboardAggregates()
+                    live_dashboard = st.empty()
+                    live_state = {"drawn_at": 0.0}
+
+                    def on_batch():
+                        render_metrics_panel(metrics, metrics_slot, downloads=False)
+                        # Redraw the partial dashboard at most every LIVE_DASHBOARD_INTERVAL seconds
+                        if time.monotonic() - live_state["drawn_at"] >= LIVE_DASHBOARD_INTERVAL:
+                            live_dashboard.plotly_chart(build_dashboard(aggregates), use_container_width=True)
+                            live_state["drawn_at"] = time.monotonic()
+
+                    results, was_masked = process_file(
+                        uploaded_file, file_type, categories, batch_size, column, separator,
+                        control=control,
+                        on_batch=on_batch,
+                        max_workers=max_workers,
+                        aggregates=aggregates,
+                        previous_labels=previous_labels
+                    )
+                    live_dashboard.empty()
+                    render_metrics_panel(metrics, metrics_slot, key="metrics_panel_final")
+                    set_results("classification_results", results)
+                    st.session_state.classification_aggregates = aggregates if results is not None else None
                     st.session_state.was_masked = was_masked
+                    if results is not None:
+                        try:
+                            run_id = save_run(
+                                results, column if file_type == "CSV" else "text", categories,
+                                source_name=uploaded_file.name, model_name=GEMINI_MODEL_NAME, was_masked=was_masked
+                            )
+                            st.toast(f"تم حفظ التشغيل رقم {run_id} في السجل", icon="💾")
+                        except sqlite3.Error as e:
+                            st.warning(f"تعذر حفظ النتائج في السجل: {str(e)}")
                 
             if st.session_state.classification_results is not None:
+                results = st.session_state.classification_results
                 st.header("📊 النتائج")
-                st.dataframe(st.session_state.classification_results, use_container_width=True)
+                text_column = column if file_type == "CSV" and column in results.columns else "text"
+                source = get_source("classification_table", lambda: DataFrameSource(results, text_column), id(results))
+                render_results_table(source, "classification_table")
+                session_bytes = sum(session_memory_report().values())
+                st.caption(f"حجم النتائج في الذاكرة: {memory_bytes(results) / 2**20:.1f} ميغابايت | إجمالي الجلسة: {session_bytes / 2**20:.1f} ميغابايت")
                 
-                fig = create_dashboard(st.session_state.classification_results)
+                with profile_stage("figure_build"):
+                    # Aggregates collected during the run spare a second scan of the results
+                    aggregates = st.session_state.get("classification_aggregates")
+                    fig = get_artifact(
+                        "classification_results", "figure",
+                        lambda df: build_dashboard(aggregates) if aggregates is not None else create_dashboard(df)
+                    )
                 st.plotly_chart(fig, use_container_width=True)
                 
-                # CSV export with proper BOM for Excel compatibility
-                csv_data = st.session_state.classification_results.to_csv(index=False, encoding='utf-8-sig', quoting=1)
+                # CSV export with proper BOM for Excel compatibility, built once per result set
+                with profile_stage("csv_export"):
+                    csv_data = get_artifact("classification_results", "csv", to_csv_bytes)
                 st.download_button(
                     label="📥 تحميل النتائج (CSV)",
-                    data=csv_data.encode('utf-8-sig'),
+                    data=csv_data,
                     file_name="classification_results.csv",
                     mime="text/csv",
                     use_container_width=True
@@ -221,4 +394,6 @@ def main():
             st.error(f"حدث خطأ: {str(e)}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    with profile_run("app"):
+        main()
+    mark_first_render("app")
@@ -0,0 +1,51 @@
+"""
+Synthetic Arabic corpora derived from the bundled examples
+"""
+import csv
+import os
+import random
+import re
+from src.config.constants import EXAMPLES_DIR
+
+# Sentence-level seeds: (file, column or None for TXT, separator for TXT)
+SEED_SOURCES = [
+    ("Legal_Documents_Examples.csv", "Description", None),
+    ("Public_Complaint_Messages.csv", "Message", None),
+    ("student_experiences_test.csv", "تجربة_الطالب", None),
+    ("support_messages.txt", None, ";"),
+    ("new.txt", None, " - "),
+]
+
+def load_seed_texts():
+    """Collect every example text as a seed sentence"""
+    seeds = []
+    for name, column, separator in SEED_SOURCES:
+        path = os.path.join(EXAMPLES_DIR, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8-sig") as f:
+            if column is not None:
+                seeds.extend(row[column].strip() for row in csv.DictReader(f) if row.get(column))
+            else:
+                seeds.extend(text.strip() for text in f.read().split(separator) if text.strip())
+    return seeds
+
+def _random_id(rng):
+    """Phone or national ID shaped like the default privacy patterns"""
+    prefix = rng.choice(["05", "1", "2"])
+    return prefix + "".join(rng.choice("0123456789") for _ in range(10 - len(prefix)))
+
+def generate_corpus(rows, seed=0, id_rate=0.2, max_sentences=4):
+    """Build a reproducible corpus of `rows` texts by recombining seed sentences
+
+    Roughly id_rate of the texts get an ID so the masking stage has work to do.
+    """
+    rng = random.Random(seed)
+    sentences = [s for text in load_seed_texts() for s in re.split(r"(?<=[.،؟!])\s+", text) if s]
+    corpus = []
+    for _ in range(rows):
+        text = " ".join(rng.choice(sentences) for _ in range(rng.randint(1, max_sentences)))
+        if rng.random() < id_rate:
+            text = f"{text} {_random_id(rng)}"
+        corpus.append(text)
+    return corpus
@@ -0,0 +1,81 @@
+"""
+Local multi-process harness for sharded processing through the work queue
+
+Starts worker processes against a temporary queue with the simulated model,
+runs one job through classify_distributed and checks that every row came
+back labeled, then reports throughput and the shards each worker took. The
+default model latency makes each shard outlast QUEUE_WORKER_TIMEOUT twice
+over, so workers that stop heartbeating mid-shard fail the run.
+
+Usage (from the project root):
+    python -m benchmarks.distributed                        # 8k rows, 4 workers, ~70 s shards
+    python -m benchmarks.distributed --rows 100000 --processes 8 --model-latency 0.05
+"""
+import argparse
+import os
+import tempfile
+import time
+from multiprocessing import get_context
+
+from streamlit import logger as st_logger
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.simulated_model import SimulatedBackend
+from src.config.constants import DEFAULT_BATCH_SIZE, DEFAULT_CATEGORIES
+from src.utils import file_processing
+from src.utils.distributed import classify_distributed, run_worker
+from src.utils.preprocessing import mask_texts
+from src.utils.work_queue import active_workers
+
+def simulated_worker(path, model_latency, seed, max_workers):
+    """Worker process with model calls routed to the simulated backend"""
+    st_logger.set_log_level("error")
+    backend = SimulatedBackend(median_latency=model_latency, seed=seed)
+    file_processing.classify_texts_batch_gemini = backend.classify
+    run_worker(worker_id=f"harness-{os.getpid()}", max_workers=max_workers, idle_exit=5, path=path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one sharded job through local worker processes")
+    parser.add_argument("--rows", type=int, default=8000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--shard-size", type=int, default=2000)
+    parser.add_argument("--max-workers", type=int, default=2, help="Concurrent model calls per worker")
+    parser.add_argument("--model-latency", type=float, default=2.0, help="Median simulated model latency in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    st_logger.set_log_level("error")
+    corpus = mask_texts(generate_corpus(args.rows, seed=args.seed))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "work_queue.db")
+        context = get_context("spawn")
+        workers = [
+            context.Process(target=simulated_worker, args=(path, args.model_latency, args.seed + i, args.max_workers))
+            for i in range(args.processes)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            while len(active_workers(path=path)) < args.processes:
+                time.sleep(0.1)
+            t0 = time.perf_counter()
+            labels = classify_distributed(corpus, DEFAULT_CATEGORIES, DEFAULT_BATCH_SIZE, args.shard_size, path=path)
+            wall = time.perf_counter() - t0
+            stats = active_workers(path=path)
+        finally:
+            for worker in workers:
+                worker.join(timeout=30)
+                if worker.is_alive():
+                    worker.terminate()
+
+    missing = sum(1 for label in labels if label is None)
+    unknown = sum(1 for label in labels if label is not None and label not in DEFAULT_CATEGORIES)
+    print(f"{args.rows:,} rows, {args.processes} workers: {wall:.2f} s, {args.rows / wall:,.0f} rows/s")
+    for worker in stats:
+        print(f"  {worker['worker_id']:<24}{worker['shards_done']:>6} shards")
+    if missing or unknown:
+        raise SystemExit(f"{missing} rows without a label, {unknown} rows with an unknown label")
+    print("all rows labeled")
+
+if __name__ == "__main__":
+    main()
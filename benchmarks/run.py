@@ -0,0 +1,204 @@
+"""
+Benchmark the classification pipeline hot paths against a simulated model
+
+Usage (from the project root):
+    python -m benchmarks.run                                  # 1k, 10k, 100k rows
+    python -m benchmarks.run --sizes 1000 1000000 --repeat 1
+    python -m benchmarks.run --save-baseline                  # store current numbers
+    python -m benchmarks.run --fail-on-regression             # CI-style comparison
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+from streamlit import logger as st_logger
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.simulated_model import SimulatedBackend
+from src.config.constants import DEFAULT_BATCH_SIZE, DEFAULT_CATEGORIES
+from src.utils import file_processing
+from src.utils.privacy import mask_ids
+from src.visualization.dashboard import create_dashboard, get_top_words
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+STAGES = ["mask_ids", "get_top_words", "create_dashboard", "process_file"]
+MASK_CHUNK = 1000
+
+def install_backend(classify):
+    """Route the pipeline's model calls to a simulated classify function"""
+    file_processing.classify_texts_batch_gemini = classify
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+def stage_mask_ids(data):
+    """Latency unit: one chunk of MASK_CHUNK texts"""
+    latencies = []
+    corpus = data["corpus"]
+    for start in range(0, len(corpus), MASK_CHUNK):
+        t0 = time.perf_counter()
+        [mask_ids(text) for text in corpus[start:start + MASK_CHUNK]]
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+def stage_get_top_words(data):
+    """Latency unit: one call over the whole corpus"""
+    t0 = time.perf_counter()
+    get_top_words(data["corpus"])
+    return [time.perf_counter() - t0]
+
+def stage_create_dashboard(data):
+    """Latency unit: one dashboard build"""
+    t0 = time.perf_counter()
+    create_dashboard(data["results"])
+    return [time.perf_counter() - t0]
+
+def stage_process_file(data):
+    """Latency unit: interval between consecutive model calls (loop overhead + model)"""
+    backend = data["backend"]
+    starts = []
+
+    def timed_classify(texts, categories, **kwargs):
+        starts.append(time.perf_counter())
+        return backend.classify(texts, categories, **kwargs)
+
+    install_backend(timed_classify)
+    data["csv"].seek(0)
+    t0 = time.perf_counter()
+    outcome = file_processing.process_file(data["csv"], "CSV", DEFAULT_CATEGORIES, DEFAULT_BATCH_SIZE, "text")
+    end = time.perf_counter()
+    install_backend(backend.classify)
+    if not outcome or outcome[0] is None:
+        raise RuntimeError("process_file failed under the simulated backend")
+    marks = [t0] + starts + [end]
+    return [b - a for a, b in zip(marks[1:], marks[2:])] or [end - t0]
+
+STAGE_FUNCS = {
+    "mask_ids": stage_mask_ids,
+    "get_top_words": stage_get_top_words,
+    "create_dashboard": stage_create_dashboard,
+    "process_file": stage_process_file,
+}
+
+def prepare(rows, seed, backend):
+    """Build the corpus and derived inputs once per size, outside any timing"""
+    corpus = generate_corpus(rows, seed=seed)
+    results = pd.DataFrame({"text": corpus, "classification": backend.classify(corpus, DEFAULT_CATEGORIES)})
+    csv = io.StringIO()
+    pd.DataFrame({"text": corpus}).to_csv(csv, index=False)
+    return {"corpus": corpus, "results": results, "csv": csv, "backend": backend}
+
+def measure(stage, data, rows, repeat, memory):
+    """Run one stage `repeat` times and summarize throughput, latency and memory"""
+    func = STAGE_FUNCS[stage]
+    walls, latencies = [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        latencies.extend(func(data))
+        walls.append(time.perf_counter() - t0)
+
+    peak_mb = None
+    if memory:
+        # Separate pass: tracemalloc slows execution too much to time under it
+        tracemalloc.start()
+        func(data)
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    wall = statistics.median(walls)
+    return {
+        "rows": rows,
+        "wall_s": round(wall, 6),
+        "throughput_rows_s": round(rows / wall, 1) if wall > 0 else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_mb": round(peak_mb, 2) if peak_mb is not None else None,
+    }
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table and return the list of regressed keys"""
+    regressions = []
+    print(f"\n{'benchmark':<28}{'rows/s':>14}{'base':>14}{'Δ':>8}{'p95 ms':>10}{'base':>10}{'Δ':>8}")
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            print(f"{key:<28}{current['throughput_rows_s'] or 0:>14,.0f}{'—':>14}")
+            continue
+        tput_delta = (current["throughput_rows_s"] or 0) / base["throughput_rows_s"] - 1 if base.get("throughput_rows_s") else 0
+        p95_delta = current["p95_ms"] / base["p95_ms"] - 1 if base.get("p95_ms") else 0
+        flag = ""
+        if tput_delta < -tolerance or p95_delta > tolerance:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<28}{current['throughput_rows_s'] or 0:>14,.0f}{base['throughput_rows_s']:>14,.0f}{tput_delta:>+8.1%}"
+              f"{current['p95_ms']:>10.2f}{base['p95_ms']:>10.2f}{p95_delta:>+8.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark classification pipeline hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-latency", type=float, default=0.0, help="Median simulated model latency in seconds")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory pass")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--output", help="Write raw results as JSON")
+    args = parser.parse_args()
+
+    # Streamlit calls are no-ops outside `streamlit run`; silence their warnings
+    st_logger.set_log_level("error")
+    backend = SimulatedBackend(median_latency=args.model_latency, seed=args.seed)
+    install_backend(backend.classify)
+
+    results = {}
+    for rows in args.sizes:
+        data = prepare(rows, args.seed, backend)
+        for stage in args.stages:
+            key = f"{stage}@{rows}"
+            results[key] = measure(stage, data, rows, args.repeat, not args.no_memory)
+            r = results[key]
+            print(f"{key:<28}{r['throughput_rows_s'] or 0:>14,.0f} rows/s  p50 {r['p50_ms']:.2f} ms  "
+                  f"p95 {r['p95_ms']:.2f} ms  p99 {r['p99_ms']:.2f} ms  peak {r['peak_mb'] or 0:.1f} MB", flush=True)
+
+    report = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        if regressions and args.fail_on_regression:
+            sys.exit(f"{len(regressions)} benchmark(s) regressed beyond {args.tolerance:.0%}")
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Offline stand-in for the Gemini batch classifier
+"""
+import math
+import random
+import threading
+import time
+import zlib
+
+class SimulatedBackend:
+    """Deterministic labels with optional log-normal latency per call"""
+
+    def __init__(self, median_latency=0.0, sigma=0.5, seed=0):
+        self.median_latency = median_latency
+        self.sigma = sigma
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _latency(self):
+        if self.median_latency <= 0:
+            return 0.0
+        with self._lock:
+            return self.median_latency * math.exp(self._rng.gauss(0, self.sigma))
+
+    def classify(self, texts, categories, **kwargs):
+        """Same signature as classify_texts_batch_gemini"""
+        with self._lock:
+            self.calls += 1
+        delay = self._latency()
+        if delay:
+            time.sleep(delay)
+        return [categories[zlib.crc32(str(text).encode("utf-8")) % len(categories)] for text in texts]
@@ -1,12 +1,27 @@
+from src.utils.startup import mark_first_render, mark_script_start
+mark_script_start()
 import streamlit as st
-import pandas as pd
 import os
 import time
 import json
-from io import StringIO
-from app import process_file
-from src.models.gemini_model import get_gemini_model
-from src.config.constants import EXAMPLES_DIR, BASE_DIR
+from src.models.gemini_model import get_gemini_model, request_options
+from src.config.constants import (
+    EXAMPLES_DIR,
+    BASE_DIR,
+    DEFAULT_MAX_WORKERS,
+    PRIORITY_INTERACTIVE,
+    STUDENT_ANALYSIS_TIMEOUT,
+    STUDENT_ASPECTS,
+    STUDENT_BATCH_SIZE
+)
+from src.utils.student_analysis import analyze_experiences
+from src.utils.job_control import JobCancelled, current_session_id, start_job, cancel_job, show_cancel_notice
+from src.utils.scheduler import model_slot
+from src.utils.metrics import get_session_metrics
+from src.visualization.performance_panel import render_metrics_panel
+from src.utils.profiling import profile_run, profile_stage
+from src.utils.results import set_results, get_artifact, to_csv_bytes, memory_bytes
+from src.visualization.results_table import DataFrameSource, get_source, render_results_table
 
 # Configure page
 st.set_page_config(
@@ -179,9 +194,21 @@ def analyze_student_experience(text):
 """
     
     try:
-        response = model.generate_content([prompt], generation_config=generation_config)
-        if time.time() - start_time > 30:
-            raise Exception("انتهت مهلة الاستجابة. يرجى المحاولة مرة أخرى.")
+        try:
+            # The client aborts the call at the deadline instead of checking after it returns;
+            # a single typed text is served ahead of queued file batches
+            with model_slot(session_id=current_session_id(), priority=PRIORITY_INTERACTIVE) as call:
+                call.timeout = STUDENT_ANALYSIS_TIMEOUT
+                response = model.generate_content(
+                    [prompt],
+                    generation_config=generation_config,
+                    request_options=request_options(timeout=STUDENT_ANALYSIS_TIMEOUT)
+                )
+        except Exception as e:
+            from google.api_core.exceptions import DeadlineExceeded
+            if isinstance(e, DeadlineExceeded) or time.time() - start_time >= STUDENT_ANALYSIS_TIMEOUT:
+                raise Exception("انتهت مهلة الاستجابة. يرجى المحاولة مرة أخرى.")
+            raise
             
         response_text = response.text.strip()
         
@@ -296,6 +323,10 @@ def main():
     # Add this at the beginning of main() to store results
     if 'results_df' not in st.session_state:
         st.session_state.results_df = None
+    show_cancel_notice()
+    metrics = get_session_metrics()
+    metrics_slot = st.sidebar.empty()
+    render_metrics_panel(metrics, metrics_slot)
 
     # Title section with description
     st.markdown("""
@@ -317,7 +348,9 @@ def main():
         
         if uploaded_file is not None:
             try:
-                df = pd.read_csv(uploaded_file)
+                import pandas as pd
+                with profile_stage("csv_parse"):
+                    df = pd.read_csv(uploaded_file)
                 
                 # Add column selection
                 if not df.empty and len(df.columns) > 0:
@@ -340,47 +373,60 @@ def main():
 
                         # Processing settings
                         st.write("**⚙️ إعدادات المعالجة**")
-                        batch_size = st.number_input(
-                            "حجم الدفعة",
-                            min_value=1,
-                            max_value=100,
-                            value=10,
-                            help="عدد النصوص التي سيتم معالجتها في كل طلب"
-                        )
+                        settings_col1, settings_col2 = st.columns(2)
+                        with settings_col1:
+                            batch_size = st.number_input(
+                                "حجم الدفعة",
+                                min_value=1,
+                                max_value=50,
+                                value=STUDENT_BATCH_SIZE,
+                                help="عدد التجارب التي سيتم تحليلها في كل طلب"
+                            )
+                        with settings_col2:
+                            max_workers = st.number_input(
+                                "عدد الطلبات المتزامنة",
+                                min_value=1,
+                                max_value=16,
+                                value=DEFAULT_MAX_WORKERS,
+                                help="عدد الدفعات التي تُرسل إلى النموذج في الوقت نفسه"
+                            )
 
                         if st.button("🚀 بدء التحليل", use_container_width=True):
                             try:
-                                with st.spinner("جاري معالجة النصوص..."):
-                                    # Convert DataFrame to file-like object
-                                    from io import StringIO
-                                    csv_buffer = StringIO()
-                                    df.to_csv(csv_buffer, index=False)
-                                    csv_buffer.seek(0)
-                                    
-                                    # Process the file
-                                    results_tuple = process_file(
-                                        csv_buffer,
-                                        "CSV",
-                                        categories=[
-                                            "رضا الطالب بالتخصص",
-                                            "عدم الرضا عن اساتذة الجامعة",
-                                            "المشاكل الأكاديمية",
-                                            "الخدمات الطلابية",
-                                            "البيئة التعليمية"
-                                        ],
-                                        batch_size=batch_size,
-                                        column=column
-                                    )
-                                    
-                                    if results_tuple:
-                                        results, was_masked = results_tuple
-                                        if results is not None:
-                                            st.success("تم تحليل الملف بنجاح!")
-                                            st.session_state.results_df = results
-                                        else:
-                                            st.error("فشل في تحليل الملف")
-                                    else:
-                                        st.error("لم يتم استلام نتائج من المعالجة")
+                                control = start_job("student_analysis_job", metrics=metrics)
+                                st.button("⏹️ إيقاف التحليل", on_click=cancel_job, args=("student_analysis_job",), use_container_width=True)
+                                progress_bar = st.progress(0)
+                                status_text = st.empty()
+                                start_time = time.time()
+                                progress_state = {"done": 0}
+
+                                def update_progress(done, total, _):
+                                    progress_state["done"] = done
+                                    progress_bar.progress(done / total)
+                                    status_text.text(f"تمت معالجة {done}/{total} دفعة خلال {time.time() - start_time:.1f} ثانية")
+                                    render_metrics_panel(metrics, metrics_slot, downloads=False)
+
+                                def show_elapsed():
+                                    status_text.text(f"تمت معالجة {progress_state['done']} دفعة خلال {time.time() - start_time:.1f} ثانية")
+
+                                results, was_masked = analyze_experiences(
+                                    df[column].tolist(),
+                                    STUDENT_ASPECTS,
+                                    batch_size=batch_size,
+                                    max_workers=max_workers,
+                                    on_progress=update_progress,
+                                    control=control,
+                                    on_tick=show_elapsed
+                                )
+                                render_metrics_panel(metrics, metrics_slot, key="metrics_panel_final")
+                                failed = int(results['error'].notna().sum())
+                                if failed:
+                                    st.warning(f"تعذر تحليل {failed} من {len(results)} نص، راجع عمود error")
+                                else:
+                                    st.success("تم تحليل الملف بنجاح!")
+                                set_results("results_df", results)
+                            except JobCancelled:
+                                st.warning("تم إيقاف التحليل قبل اكتماله")
                             except Exception as e:
                                 st.error(f"حدث خطأ أثناء معالجة الملف: {str(e)}")
                                 return
@@ -388,13 +434,26 @@ def main():
                         # Display results if available
                         if st.session_state.results_df is not None:
                             st.header("📊 النتائج")
-                            st.dataframe(st.session_state.results_df, use_container_width=True)
+                            results = st.session_state.results_df
+                            source = get_source(
+                                "student_table",
+                                lambda: DataFrameSource(results, "text", "dominant_aspect"),
+                                id(results)
+                            )
+                            render_results_table(source, "student_table")
+                            st.caption(f"حجم النتائج في الذاكرة: {memory_bytes(st.session_state.results_df) / 2**20:.1f} ميغابايت")
+
+                            aspect_columns = [aspect for aspect in STUDENT_ASPECTS if aspect in st.session_state.results_df.columns]
+                            if aspect_columns:
+                                st.subheader("📈 متوسط نسب الجوانب")
+                                st.bar_chart(st.session_state.results_df[aspect_columns].astype(float).mean().round(1))
                             
-                            # CSV export with proper BOM for Excel compatibility
-                            csv_data = st.session_state.results_df.to_csv(index=False, encoding='utf-8-sig', quoting=1)
+                            # CSV export with proper BOM for Excel compatibility, built once per result set
+                            with profile_stage("csv_export"):
+                                csv_data = get_artifact("results_df", "csv", to_csv_bytes)
                             st.download_button(
                                 label="📥 تحميل النتائج (CSV)",
-                                data=csv_data.encode('utf-8-sig'),
+                                data=csv_data,
                                 file_name="student_experience_results.csv",
                                 mime="text/csv",
                                 use_container_width=True
@@ -435,4 +494,6 @@ def main():
                 st.error(f"حدث خطأ أثناء التحليل: {str(e)}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    with profile_run("students_experience"):
+        main()
+    mark_first_render("students_experience")
@@ -1,8 +1,16 @@
+from src.utils.startup import mark_first_render, mark_script_start, startup_report
+mark_script_start()
 import streamlit as st
+import html
 import json
 import os
-from src.config.constants import SETTINGS_FILE, STATIC_DIR
+import sqlite3
+from src.config.constants import PROFILE_DIR, PROFILE_ENV_VAR, SETTINGS_FILE, STATIC_DIR
 from src.utils.privacy import clear_privacy_cache
+from src.utils.performance_settings import load_performance_settings, save_performance_settings
+from src.utils.chunking import MERGE_RULES
+from src.utils.keyword_rules import read_rules, save_rules
+from src.utils.work_queue import active_workers
 
 # Constants
 SETTINGS_FILE = "config/privacy_settings.json"
@@ -239,6 +247,184 @@ def is_duplicate_pattern(settings, start_with, length):
         for pattern in settings["id_patterns"]
     )
 
+def render_rule_settings():
+    """Keyword rules that label matching texts without a model call"""
+    st.header("🏷️ قواعد التصنيف بالكلمات المفتاحية")
+    st.caption("النص الذي يحتوي على كلمات مفتاحية لفئة واحدة فقط يُصنف مباشرة دون إرساله إلى النموذج")
+    rules = read_rules()
+
+    with st.container():
+        category = st.text_input("الفئة", placeholder="مثال: شكوى", help="يجب أن تطابق اسم الفئة المدخل عند التصنيف")
+        keywords_input = st.text_area("الكلمات أو العبارات المفتاحية (واحدة في كل سطر)", placeholder="لم يصل الطلب\nتأخر التوصيل")
+        if st.button("💾 إضافة قاعدة", use_container_width=True):
+            keywords = [keyword.strip() for keyword in keywords_input.split("\n") if keyword.strip()]
+            if not category.strip() or not keywords:
+                st.toast("الرجاء إدخال الفئة وكلمة مفتاحية واحدة على الأقل", icon="⚠️")
+            else:
+                rules["rules"].append({"category": category.strip(), "keywords": keywords})
+                save_rules(rules)
+                st.toast("تمت إضافة القاعدة", icon="✅")
+                st.rerun()
+
+    if not rules["rules"]:
+        st.markdown("""
+        <div class="settings-card" style="text-align: center; color: #6b7280;">
+            لا توجد قواعد مضافة حالياً
+        </div>
+        """, unsafe_allow_html=True)
+    for i, rule in enumerate(rules["rules"]):
+        col1, col2 = st.columns([1, 6])
+        with col1:
+            if st.button("🗑️", key=f"delete_rule_{i}"):
+                rules["rules"].pop(i)
+                save_rules(rules)
+                st.rerun()
+        with col2:
+            st.markdown(f"""
+            <div class="pattern-item">
+                <div class="pattern-info">
+                    <div><strong>الفئة:</strong> <span class="pattern-value">{html.escape(rule['category'])}</span></div>
+                    <div><strong>الكلمات:</strong> <span class="pattern-description">{html.escape('، '.join(rule['keywords']))}</span></div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+def render_performance_settings():
+    """Performance options stored in the shared performance settings file"""
+    st.header("⚡ إعدادات الأداء")
+    perf_settings = load_performance_settings()
+    profiling = perf_settings["profiling"]
+
+    with st.container():
+        enabled = st.checkbox(
+            "تفعيل تحليل الأداء (Profiling)",
+            value=profiling["enabled"],
+            help=f"يحفظ ملفات التحليل لكل تشغيل في {PROFILE_DIR}. المتغير {PROFILE_ENV_VAR} يتجاوز هذا الإعداد"
+        )
+        mode = st.selectbox(
+            "نوع التحليل",
+            options=["sampling", "deterministic"],
+            index=0 if profiling["mode"] == "sampling" else 1,
+            format_func=lambda m: {"sampling": "أخذ عينات (تكلفة منخفضة)", "deterministic": "حتمي (cProfile)"}[m]
+        )
+        if enabled != profiling["enabled"] or mode != profiling["mode"]:
+            perf_settings["profiling"].update(enabled=enabled, mode=mode)
+            save_performance_settings(perf_settings)
+            st.toast("تم حفظ إعدادات الأداء", icon="✅")
+
+        hedging = perf_settings["hedging"]
+        st.subheader("🛡️ الطلبات الاحتياطية")
+        hedge_enabled = st.checkbox(
+            "إرسال طلب احتياطي عند تأخر الدفعة",
+            value=hedging["enabled"],
+            help="إذا تجاوزت الدفعة زمن النسبة المئوية المحددة من الطلبات الأخيرة يُرسل طلب مكرر ويُعتمد أسرع رد"
+        )
+        percentile = st.select_slider(
+            "النسبة المئوية للزمن",
+            options=[0.9, 0.95, 0.99],
+            value=hedging["percentile"],
+            format_func=lambda q: f"p{int(q * 100)}"
+        )
+        budget = st.slider(
+            "الحد الأقصى للطلبات الإضافية (%)",
+            min_value=1,
+            max_value=20,
+            value=int(round(hedging["budget"] * 100))
+        ) / 100
+        if (hedge_enabled, percentile, budget) != (hedging["enabled"], hedging["percentile"], hedging["budget"]):
+            perf_settings["hedging"].update(enabled=hedge_enabled, percentile=percentile, budget=budget)
+            save_performance_settings(perf_settings)
+            st.toast("تم حفظ إعدادات الأداء", icon="✅")
+
+        long_texts = perf_settings["long_texts"]
+        st.subheader("📏 النصوص الطويلة")
+        max_tokens = st.number_input(
+            "الحد الأقصى لطول النص (رموز تقريبية)",
+            min_value=200,
+            max_value=20000,
+            value=long_texts["max_tokens"],
+            step=100,
+            help="النصوص الأطول تُقسم إلى أجزاء تُصنف في طلبات منفصلة"
+        )
+        chunk_tokens = st.number_input(
+            "طول الجزء (رموز تقريبية)",
+            min_value=100,
+            max_value=int(max_tokens),
+            value=min(long_texts["chunk_tokens"], int(max_tokens)),
+            step=100
+        )
+        merge_rule = st.selectbox(
+            "طريقة دمج تصنيفات الأجزاء",
+            options=list(MERGE_RULES),
+            index=list(MERGE_RULES).index(long_texts["merge_rule"]),
+            format_func=MERGE_RULES.get
+        )
+        if (max_tokens, chunk_tokens, merge_rule) != (long_texts["max_tokens"], long_texts["chunk_tokens"], long_texts["merge_rule"]):
+            perf_settings["long_texts"].update(max_tokens=int(max_tokens), chunk_tokens=int(chunk_tokens), merge_rule=merge_rule)
+            save_performance_settings(perf_settings)
+            st.toast("تم حفظ إعدادات الأداء", icon="✅")
+
+        dedup = perf_settings["dedup"]
+        st.subheader("♻️ النصوص المتشابهة")
+        dedup_enabled = st.checkbox(
+            "تصنيف النصوص شبه المتطابقة مرة واحدة",
+            value=dedup["enabled"],
+            help="تُجمع الرسائل التي لا تختلف إلا في كلمات قليلة أو المعرفات المخفية، ويُعمم تصنيف أول نص في كل مجموعة. الأرقام تبقى جزءاً من المقارنة"
+        )
+        threshold = st.slider(
+            "حد التشابه",
+            min_value=0.5,
+            max_value=1.0,
+            value=float(dedup["threshold"]),
+            step=0.05
+        )
+        if (dedup_enabled, threshold) != (dedup["enabled"], dedup["threshold"]):
+            perf_settings["dedup"].update(enabled=dedup_enabled, threshold=threshold)
+            save_performance_settings(perf_settings)
+            st.toast("تم حفظ إعدادات الأداء", icon="✅")
+
+        distributed = perf_settings["distributed"]
+        st.subheader("🖧 المعالجة الموزعة")
+        distributed_enabled = st.checkbox(
+            "توزيع الملفات الكبيرة على عمليات المعالجة",
+            value=distributed["enabled"],
+            help="تُقسم المهمة إلى أجزاء في قائمة انتظار مشتركة وتعالجها العمليات المشغلة عبر scripts/queue_worker.py"
+        )
+        col1, col2 = st.columns(2)
+        min_rows = col1.number_input(
+            "الحد الأدنى لعدد الصفوف",
+            min_value=1000,
+            max_value=10000000,
+            value=distributed["min_rows"],
+            step=1000
+        )
+        shard_size = col2.number_input(
+            "عدد النصوص في كل جزء",
+            min_value=100,
+            max_value=100000,
+            value=distributed["shard_size"],
+            step=100
+        )
+        if (distributed_enabled, min_rows, shard_size) != (distributed["enabled"], distributed["min_rows"], distributed["shard_size"]):
+            perf_settings["distributed"].update(enabled=distributed_enabled, min_rows=int(min_rows), shard_size=int(shard_size))
+            save_performance_settings(perf_settings)
+            st.toast("تم حفظ إعدادات الأداء", icon="✅")
+        try:
+            workers = active_workers()
+        except sqlite3.Error as e:
+            workers = []
+            st.warning(f"تعذر قراءة قائمة الانتظار: {str(e)}")
+        if workers:
+            st.caption(f"العمليات النشطة: {len(workers)} | " + "، ".join(f"{w['worker_id']} ({w['shards_done']})" for w in workers))
+        else:
+            st.caption("لا توجد عمليات نشطة؛ تُعالج الملفات محلياً. للتشغيل: python scripts/queue_worker.py --processes 4")
+
+        with st.expander("⏱️ زمن بدء التشغيل"):
+            report = startup_report()
+            st.write("زمن العرض الأول لكل صفحة (ثانية):", report["first_render_s"] or "لا توجد بيانات بعد")
+            st.write("المكتبات الثقيلة المحملة:", report["loaded_modules"])
+            st.caption("للقياس من بداية باردة: python scripts/measure_startup.py")
+
 def main():
     # Initialize session state for toast messages
     if "show_toast" not in st.session_state:
@@ -355,5 +541,9 @@ def main():
             </div>
             """, unsafe_allow_html=True)
 
+    render_rule_settings()
+    render_performance_settings()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    mark_first_render("settings")
\ No newline at end of file
@@ -0,0 +1,74 @@
+from src.utils.startup import mark_first_render, mark_script_start
+mark_script_start()
+import streamlit as st
+import os
+import time
+from src.config.constants import STATIC_DIR
+from src.utils.results_db import list_runs, label_counts, load_results, delete_run
+from src.utils.results import to_csv_bytes
+from src.utils.profiling import profile_run, profile_stage
+from src.visualization.results_table import RunSource, render_results_table
+
+# Configure page
+st.set_page_config(
+    page_title="مصنف",
+    page_icon="🗂️",
+    layout="centered"
+)
+
+with open(os.path.join(STATIC_DIR, "style.css"), encoding="utf-8") as f:
+    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+
+def format_run(run):
+    """Label of a run in the selector"""
+    created = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["created_at"]))
+    return f"#{run['run_id']} | {created} | {run['source_name'] or '-'} | {run['row_count']:,} نص"
+
+def main():
+    st.title("🗂️ سجل التصنيفات")
+    st.write("استعرض نتائج التشغيلات السابقة دون إعادة التصنيف.")
+
+    runs = list_runs()
+    if not runs:
+        st.info("لا توجد تشغيلات محفوظة بعد. ستظهر هنا نتائج كل تصنيف مكتمل.")
+        return
+
+    run = st.selectbox("اختر التشغيل:", runs, format_func=format_run)
+    st.write("الفئات:", run["categories"])
+
+    with profile_stage("history_query"):
+        counts = label_counts(run["run_id"])
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("عدد النصوص", f"{run['row_count']:,}")
+    col2.metric("عدد الفئات", f"{len(counts):,}")
+    col3.metric("إخفاء المعرفات", "نعم" if run["was_masked"] else "لا")
+
+    if counts:
+        st.subheader("📊 توزيع التصنيفات")
+        st.bar_chart(counts)
+
+    key = f"history_{run['run_id']}"
+    render_results_table(RunSource(run), key)
+    labels = st.session_state.get(f"{key}_labels", [])
+    search = st.session_state.get(f"{key}_search", "").strip()
+
+    if st.button("📥 تجهيز ملف CSV للنتائج المصفاة", use_container_width=True):
+        st.download_button(
+            label="📥 تحميل النتائج (CSV)",
+            data=to_csv_bytes(load_results(run["run_id"], labels, search)),
+            file_name=f"classification_run_{run['run_id']}.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+
+    with st.expander("🗑️ حذف التشغيل"):
+        confirmed = st.checkbox("أؤكد حذف هذا التشغيل ونتائجه نهائياً", key=f"confirm_delete_{run['run_id']}")
+        if st.button("حذف هذا التشغيل نهائياً", use_container_width=True, disabled=not confirmed):
+            delete_run(run["run_id"])
+            st.rerun()
+
+if __name__ == "__main__":
+    with profile_run("history"):
+        main()
+    mark_first_render("history")
@@ -0,0 +1,92 @@
+"""
+Measure cold start and first render of each page in a fresh interpreter
+
+Each page script is executed in bare mode (no Streamlit server) under
+`python -X importtime`, so the numbers cover interpreter start, imports and
+the first render of the page with no user input.
+
+Usage (from the project root):
+    python scripts/measure_startup.py [--repeat 5] [--top 15] [--json startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = [
+    "app.py",
+    "pages/1_Students_Experience.py",
+    "pages/2_Example.py",
+    "pages/3_Settings.py",
+    "pages/4_History.py",
+]
+HEAVY_MODULES = ["pandas", "plotly", "google.generativeai"]
+
+RUNNER = """
+import logging, runpy, sys, time
+t0 = time.perf_counter()
+logging.disable(logging.WARNING)
+sys.path.insert(0, {base!r})
+runpy.run_path({path!r}, run_name="__main__")
+elapsed = time.perf_counter() - t0
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print("STARTUP_RESULT", elapsed, ",".join(loaded) or "-")
+"""
+
+def parse_importtime(stderr):
+    """Return {module: cumulative_us} from -X importtime output"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cum_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        cumulative[name.strip()] = int(cum_us)
+    return cumulative
+
+def measure_page(page):
+    """Run one page cold and return (render_seconds, loaded_heavy_modules, importtime)"""
+    code = RUNNER.format(base=BASE_DIR, path=os.path.join(BASE_DIR, page), heavy=HEAVY_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BASE_DIR, capture_output=True, text=True
+    )
+    result = [line for line in proc.stdout.splitlines() if line.startswith("STARTUP_RESULT")]
+    if proc.returncode != 0 or not result:
+        raise RuntimeError(f"{page} failed to start:\n{proc.stderr[-2000:]}")
+    _, elapsed, loaded = result[-1].split()
+    return float(elapsed), [] if loaded == "-" else loaded.split(","), parse_importtime(proc.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start per page")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list per page")
+    parser.add_argument("--json", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = {}
+    for page in PAGES:
+        runs = [measure_page(page) for _ in range(args.repeat)]
+        elapsed = statistics.median(run[0] for run in runs)
+        loaded, imports = runs[-1][1], runs[-1][2]
+        top_level = {name: us for name, us in imports.items() if "." not in name}
+        slowest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        report[page] = {
+            "first_render_s": round(elapsed, 3),
+            "heavy_modules_loaded": loaded,
+            "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in slowest},
+        }
+
+        print(f"\n{page}: first render {elapsed * 1000:.0f} ms (median of {args.repeat})")
+        print(f"  heavy modules loaded: {', '.join(loaded) or 'none'}")
+        for name, us in slowest:
+            print(f"  {us / 1000:>9.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
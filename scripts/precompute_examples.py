@@ -0,0 +1,57 @@
+"""
+Build step: classify the bundled legal example once and store the results
+
+Usage (from the project root):
+    python scripts/precompute_examples.py [--force]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.constants import (
+    LEGAL_EXAMPLE_FILE,
+    LEGAL_EXAMPLE_NAME,
+    LEGAL_EXAMPLE_CATEGORIES,
+    LEGAL_EXAMPLE_COLUMN,
+    LEGAL_EXAMPLE_BATCH_SIZE,
+    GEMINI_MODEL_NAME
+)
+from src.utils.example_cache import precomputed_key, load_precomputed, save_precomputed
+from src.utils.file_processing import process_file
+from src.visualization.dashboard import create_dashboard
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute results for the bundled legal example")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if stored results are current")
+    args = parser.parse_args()
+
+    key = precomputed_key(LEGAL_EXAMPLE_FILE, LEGAL_EXAMPLE_CATEGORIES, GEMINI_MODEL_NAME)
+    if not args.force and load_precomputed(LEGAL_EXAMPLE_NAME, key) is not None:
+        print(f"Precomputed results are up to date ({key[:12]})")
+        return
+
+    outcome = process_file(
+        LEGAL_EXAMPLE_FILE,
+        "CSV",
+        LEGAL_EXAMPLE_CATEGORIES,
+        LEGAL_EXAMPLE_BATCH_SIZE,
+        LEGAL_EXAMPLE_COLUMN
+    )
+    results = outcome[0] if outcome else None
+    if results is None:
+        sys.exit("Classification failed; nothing was stored")
+
+    save_precomputed(
+        LEGAL_EXAMPLE_NAME,
+        key,
+        results,
+        create_dashboard(results),
+        LEGAL_EXAMPLE_CATEGORIES,
+        GEMINI_MODEL_NAME
+    )
+    print(f"Stored {len(results)} rows ({key[:12]})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Run queue workers that classify shards of large jobs
+
+Start any number of these on the machine running the app (or point
+ARABIC_CLASSIFIER_QUEUE_DB at the same file on a volume with reliable
+SQLite locking), then enable distributed processing in the Settings page.
+
+Usage (from the project root):
+    python scripts/queue_worker.py [--processes 4] [--max-workers 2] [--idle-exit 60]
+"""
+import argparse
+import os
+import sys
+from multiprocessing import get_context
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+def worker_main(max_workers, idle_exit, path):
+    from streamlit import logger as st_logger
+    from src.utils.distributed import run_worker
+    # Streamlit calls are no-ops outside `streamlit run`; silence their warnings
+    st_logger.set_log_level("error")
+    run_worker(max_workers=max_workers, idle_exit=idle_exit, path=path)
+
+def main():
+    from src.config.constants import DEFAULT_MAX_WORKERS, QUEUE_DB_FILE
+    parser = argparse.ArgumentParser(description="Classify queued shards")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to start")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent model calls per process")
+    parser.add_argument("--idle-exit", type=float, default=None, help="Exit after this many idle seconds")
+    parser.add_argument("--db", default=QUEUE_DB_FILE, help="Queue database path")
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        worker_main(args.max_workers, args.idle_exit, args.db)
+        return
+    context = get_context("spawn")
+    processes = [
+        context.Process(target=worker_main, args=(args.max_workers, args.idle_exit, args.db))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+if __name__ == "__main__":
+    main()
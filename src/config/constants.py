@@ -2,17 +2,73 @@ import os
 
 # API Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
 
 # Base paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 CONFIG_DIR = os.path.join(BASE_DIR, "config")
 EXAMPLES_DIR = os.path.join(BASE_DIR, "examples")
 STATIC_DIR = os.path.join(BASE_DIR, "static")
+DATA_DIR = os.path.join(BASE_DIR, "data")
 
 # Classification Settings
 DEFAULT_CATEGORIES = ["إيجابي", "سلبي", "محايد"]
 DEFAULT_BATCH_SIZE = 25
 DEFAULT_SEPARATOR = "\n"
+DEFAULT_MAX_WORKERS = 4
+CLASSIFICATION_ERROR_LABEL = "تعذر التصنيف"  # texts that fail even when sent alone
+
+# Fair-share Scheduling of Model Calls
+PRIORITY_INTERACTIVE = 0  # single texts typed by a user
+PRIORITY_BULK = 1  # file jobs
+SCHEDULER_MAX_CONCURRENCY = 16  # model calls in flight across all sessions
+SCHEDULER_SESSION_LIMIT = 8  # per session; sessions stand in for users
+SCHEDULER_INTERACTIVE_RESERVE = 2  # slots bulk calls may not take
+
+# Cross-session Request Coalescing
+COALESCE_MAX_BATCH = DEFAULT_BATCH_SIZE
+COALESCE_MAX_WAIT = 0.15  # seconds a partial batch waits for company
+COALESCE_MAX_INFLIGHT = 8
+COALESCE_IDLE_SECONDS = 60  # an unused coalescer stops its flush thread after this
+
+# Deadlines (seconds)
+MODEL_CALL_TIMEOUT = 60
+STUDENT_ANALYSIS_TIMEOUT = 30
+DEFAULT_JOB_DEADLINE = 60 * 60
+
+# Pre-flight Estimation
+LATENCY_HISTORY_FILE = os.path.join(DATA_DIR, "latency_history.jsonl")
+ARABIC_CHARS_PER_TOKEN = 3.0
+LATIN_CHARS_PER_TOKEN = 4.0
+OUTPUT_TOKEN_WEIGHT = 20  # generating a token costs roughly this many prompt tokens
+DEFAULT_CALL_LATENCY = 1.5  # seconds, used until enough history exists
+DEFAULT_SECONDS_PER_TOKEN = 0.0004
+LATENCY_HISTORY_MAX = 2000
+LATENCY_MIN_SAMPLES = 20
+CONCURRENCY_OPTIONS = [1, 2, 4, 8]
+
+# Parallel Preprocessing
+PARALLEL_MIN_ROWS = 50000  # smaller inputs are preprocessed inline
+PARALLEL_CHUNK_SIZE = 10000  # texts handed to a worker per task
+
+# Results Store
+RESULTS_DB_FILE = os.path.join(DATA_DIR, "results.db")
+TABLE_PAGE_SIZES = [25, 50, 100, 200]
+LIVE_DASHBOARD_INTERVAL = 2.0  # seconds between live dashboard redraws
+
+# Metrics
+METRICS_MAX_RECORDS = 10000
+METRICS_PREFIX = "arabic_classifier"
+
+# Student Experience Analysis
+STUDENT_ASPECTS = [
+    "رضا الطالب بالتخصص",
+    "عدم الرضا عن اساتذة الجامعة",
+    "المشاكل الأكاديمية",
+    "الخدمات الطلابية",
+    "البيئة التعليمية"
+]
+STUDENT_BATCH_SIZE = 10
 
 # UI Configuration
 CUSTOM_COLORS = ['#2ecc71', '#e74c3c', '#3498db', '#f1c40f', '#9b59b6', '#1abc9c']
@@ -34,7 +90,62 @@ SEPARATOR_OPTIONS = [
     (";", "فاصلة منقوطة (;)"),
     ("custom", "فاصل مخصص ✏️")
 ]
+TXT_READ_CHUNK = 1 << 20  # bytes read per step when splitting TXT uploads
+TXT_PREVIEW_RECORDS = 100
+TXT_STATS_BATCH = 10000  # records prepared (e.g. masked) together when measuring TXT uploads
+
+# Bundled Legal Example
+LEGAL_EXAMPLE_FILE = os.path.join(EXAMPLES_DIR, "Legal_Documents_Examples.csv")
+LEGAL_EXAMPLE_NAME = "legal_documents"
+LEGAL_EXAMPLE_CATEGORIES = ["الجنائي", "التجاري", "الأسري", "الإداري"]
+LEGAL_EXAMPLE_COLUMN = "Description"
+LEGAL_EXAMPLE_BATCH_SIZE = 25
+
+# Precomputed Results
+PRECOMPUTED_DIR = os.path.join(EXAMPLES_DIR, "precomputed")
 
 # Privacy Settings
 SETTINGS_FILE = os.path.join(CONFIG_DIR, "privacy_settings.json")
-PRIVACY_CACHE_KEY = "privacy_patterns_cache" 
\ No newline at end of file
+PRIVACY_CACHE_KEY = "privacy_patterns_cache"
+PRIVACY_RECHECK_SECONDS = 2  # how often the shared compiled ID patterns look for an edited settings file
+
+# Performance Settings
+PERFORMANCE_SETTINGS_FILE = os.path.join(CONFIG_DIR, "performance_settings.json")
+CLASSIFICATION_RULES_FILE = os.path.join(CONFIG_DIR, "classification_rules.json")
+DEFAULT_PERFORMANCE_SETTINGS = {
+    "profiling": {"enabled": False, "mode": "sampling", "interval_ms": 5},
+    "hedging": {"enabled": False, "percentile": 0.95, "budget": 0.05},
+    "long_texts": {"max_tokens": 1500, "chunk_tokens": 800, "merge_rule": "majority"},
+    "dedup": {"enabled": False, "threshold": 0.85},
+    "distributed": {"enabled": False, "min_rows": 20000, "shard_size": 2000}
+}
+HEDGE_MIN_SAMPLES = 20  # recent calls needed before hedging starts
+HEDGE_WINDOW = 200  # recent calls the percentile is taken over
+HEDGE_MIN_DELAY = 1.0  # seconds; never hedge earlier than this
+LONG_TEXT_CHUNKS_PER_BATCH = 4
+
+# Near-duplicate Detection
+DEDUP_NUM_PERM = 64  # MinHash signature length
+DEDUP_BANDS = 16  # LSH bands; candidates are verified against the threshold
+DEDUP_SHINGLE = 4  # characters per shingle
+
+# Circuit Breaker
+CIRCUIT_WINDOW = 20  # most recent model calls the error rate is taken over
+CIRCUIT_MIN_CALLS = 8  # calls needed in the window before the breaker can trip
+CIRCUIT_FAILURE_RATE = 0.5  # share of failed or slow calls that trips the breaker
+CIRCUIT_SLOW_CALL = 0.75 * MODEL_CALL_TIMEOUT  # seconds; slower successful calls count as failures
+CIRCUIT_OPEN_SECONDS = 30  # fail fast for this long before probing again
+CIRCUIT_HALF_OPEN_PROBES = 1  # concurrent trial calls while probing
+
+# Distributed Processing
+QUEUE_DB_ENV_VAR = "ARABIC_CLASSIFIER_QUEUE_DB"  # one queue file for the app and its workers (same host, or a volume with reliable locking)
+QUEUE_DB_FILE = os.getenv(QUEUE_DB_ENV_VAR) or os.path.join(DATA_DIR, "work_queue.db")
+QUEUE_LEASE_SECONDS = 300  # a shard held longer than this without renewal is handed to another worker
+QUEUE_MAX_ATTEMPTS = 3
+QUEUE_POLL_INTERVAL = 1.0
+QUEUE_WORKER_TIMEOUT = 30  # seconds since a worker's last heartbeat before it counts as gone
+QUEUE_JOB_CHECK_INTERVAL = 5  # seconds between a busy worker's heartbeats and checks that its job was not deleted
+
+# Profiling
+PROFILE_DIR = os.path.join(BASE_DIR, "profiles")
+PROFILE_ENV_VAR = "ARABIC_CLASSIFIER_PROFILE" 
\ No newline at end of file
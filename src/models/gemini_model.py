@@ -1,19 +1,53 @@
-import google.generativeai as genai
+import json
+import time
 import streamlit as st
-# from src.config.constants import GEMINI_API_KEY
+from src.config.constants import GEMINI_API_KEY, GEMINI_MODEL_NAME, MODEL_CALL_TIMEOUT
+from src.utils.job_control import JobStopped
+from src.utils.metrics import record_call
+from src.utils.estimator import estimate_tokens
+from src.utils.scheduler import model_slot
 
 
-GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
-GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+class ContentError(Exception):
+    """The model could not answer for this request's texts; a smaller request may succeed"""
+
+
+def get_api_key():
+    """Read the API key from Streamlit secrets, falling back to the environment"""
+    try:
+        return st.secrets["GEMINI_API_KEY"]
+    except Exception:
+        # No secrets file or no key in it
+        return GEMINI_API_KEY
 
 @st.cache_resource
 def get_gemini_model():
     """Lazy load Gemini model"""
-    genai.configure(api_key=GEMINI_API_KEY)
+    # Imported here: the client SDK is the slowest import in the app
+    import google.generativeai as genai
+    genai.configure(api_key=get_api_key())
     return genai.GenerativeModel(GEMINI_MODEL_NAME)
 
-def classify_texts_batch_gemini(texts, categories):
-    """Classify multiple texts at once using Gemini API"""
+def request_options(control=None, timeout=MODEL_CALL_TIMEOUT):
+    """Client request options carrying the per-call deadline
+
+    The timeout is clipped to the job's remaining time, and a cancelled or
+    expired job raises here before a request is sent.
+    """
+    if control is not None:
+        timeout = control.call_timeout(timeout)
+    return {"timeout": timeout}
+
+def classify_texts_batch_gemini(texts, categories, control=None, timeout=MODEL_CALL_TIMEOUT, strict=False):
+    """Classify multiple texts at once using Gemini API
+
+    strict adds an explicit instruction to copy the category names verbatim,
+    for re-requests of texts whose first labels matched no category.
+    """
+    metrics = control.metrics if control is not None else None
+    prompt = ""
+    response = None
+    started = time.perf_counter()
     try:
         model = get_gemini_model()
         numbered_texts = "\n".join([f"{i}. {text}" for i, text in enumerate(texts, 1)])
@@ -27,9 +61,160 @@ For your response:
 2. Each line should contain ONLY the number and category
 3. Format: "1. Category"
 4. No explanations or additional text"""
+        if strict:
+            prompt += "\n5. Copy the category name exactly as written in the list above, with no translation, article or punctuation"
         
-        response = model.generate_content([prompt])
-        return [line.split('. ')[1].strip() for line in response.text.strip().split('\n')]
+        # Queue for a fair-share slot first so waiting does not count as call latency
+        with model_slot(control) as call:
+            options = request_options(control, timeout)
+            call.timeout = options["timeout"]
+            started = time.perf_counter()
+            response = model.generate_content([prompt], request_options=options)
+        # Raises ValueError when the answer was blocked or empty
+        output = response.text.strip()
         
+    except JobStopped:
+        raise
     except Exception as e:
-        raise Exception(f"Gemini batch classification failed: {str(e)}") 
\ No newline at end of file
+        record_call(metrics, "classify", started, len(texts), prompt_chars=len(prompt), ok=False)
+        # A rejected request (400, e.g. input too long) or unreadable answer depends on the texts
+        content_error = getattr(e, "code", None) == 400 or (isinstance(e, ValueError) and response is not None)
+        error_type = ContentError if content_error else Exception
+        raise error_type(f"Gemini batch classification failed: {str(e)}")
+    
+    labels = {}
+    parse_failures = 0
+    for line in output.split('\n'):
+        if not line.strip():
+            continue
+        parts = line.split('. ', 1)
+        if len(parts) < 2 or not parts[0].strip().isdigit():
+            parse_failures += 1
+            continue
+        labels[int(parts[0].strip())] = parts[1].strip()
+    # Every input number must come back exactly once, or labels would shift onto the wrong texts
+    missing = [i for i in range(1, len(texts) + 1) if i not in labels]
+    parse_failures += len(missing)
+    
+    record_call(
+        metrics, "classify", started, len(texts),
+        prompt_chars=len(prompt), output_chars=len(output),
+        prompt_tokens=estimate_tokens(prompt), output_tokens=estimate_tokens(output),
+        parse_failures=parse_failures, ok=not missing
+    )
+    # Stray lines are tolerated once every number has its label
+    if missing:
+        raise ContentError(f"Gemini batch classification failed: expected {len(texts)} labels, got {len(texts) - len(missing)}")
+    return [labels[i] for i in range(1, len(texts) + 1)]
+
+def build_aspects_schema(aspects):
+    """Structured output schema: one object per input text with a percentage per aspect"""
+    return {
+        "type": "ARRAY",
+        "items": {
+            "type": "OBJECT",
+            "properties": {
+                "index": {"type": "INTEGER"},
+                "aspects": {
+                    "type": "ARRAY",
+                    "items": {
+                        "type": "OBJECT",
+                        "properties": {
+                            "name": {"type": "STRING", "enum": list(aspects)},
+                            "percentage": {"type": "NUMBER"}
+                        },
+                        "required": ["name", "percentage"]
+                    }
+                }
+            },
+            "required": ["index", "aspects"]
+        }
+    }
+
+def validate_aspects_item(item, aspects):
+    """Validate one analyzed item and return its percentages keyed by aspect"""
+    if not isinstance(item, dict) or not isinstance(item.get("aspects"), list):
+        raise ValueError("عنصر غير صالح في الاستجابة")
+
+    percentages = {aspect: 0.0 for aspect in aspects}
+    for entry in item["aspects"]:
+        if not isinstance(entry, dict):
+            raise ValueError("بيانات الجانب غير مكتملة")
+        name = str(entry.get("name", "")).replace('**', '').strip()
+        percentage = entry.get("percentage")
+        if name not in percentages:
+            raise ValueError(f"جانب غير معروف: {name}")
+        if isinstance(percentage, bool) or not isinstance(percentage, (int, float)) or not 0 <= percentage <= 100:
+            raise ValueError(f"نسبة غير صالحة للجانب: {name}")
+        percentages[name] += float(percentage)
+
+    total = sum(percentages.values())
+    if not (95 <= total <= 105):  # Allow small deviation
+        raise ValueError("مجموع النسب المئوية غير صحيح")
+    return {aspect: round(value * 100 / total, 1) for aspect, value in percentages.items()}
+
+def analyze_experiences_batch_gemini(texts, aspects, model=None, control=None, timeout=MODEL_CALL_TIMEOUT, retries=0):
+    """Analyze several student experiences in one request against fixed aspects
+
+    Returns one (percentages, error) pair per input text; each item is
+    validated on its own so one bad answer does not fail the whole batch.
+    """
+    model = model or get_gemini_model()
+    numbered_texts = "\n".join([f"{i}. {text}" for i, text in enumerate(texts, 1)])
+    prompt = f"""قم بتحليل كل تجربة من تجارب الطلاب المرقمة التالية وتوزيعها على الجوانب التالية فقط: {', '.join(aspects)}
+
+التجارب:
+{numbered_texts}
+
+ملاحظات مهمة:
+- أعد عنصراً واحداً لكل تجربة يحمل رقمها في الحقل index
+- النسبة المئوية رقم فقط بدون علامة %
+- يجب أن يكون مجموع النسب لكل تجربة 100"""
+
+    generation_config = {
+        "temperature": 0.2,
+        "max_output_tokens": min(8192, 256 + 128 * len(texts)),
+        "response_mime_type": "application/json",
+        "response_schema": build_aspects_schema(aspects),
+    }
+
+    metrics = control.metrics if control is not None else None
+    with model_slot(control) as call:
+        options = request_options(control, timeout)
+        call.timeout = options["timeout"]
+        started = time.perf_counter()
+        try:
+            response = model.generate_content([prompt], generation_config=generation_config, request_options=options)
+        except Exception:
+            record_call(metrics, "analyze", started, len(texts), prompt_chars=len(prompt), retries=retries, ok=False)
+            raise
+    try:
+        output = response.text
+        items = json.loads(output)
+        if not isinstance(items, list):
+            raise ValueError("تنسيق JSON غير صالح")
+    except Exception as e:
+        parse_failed = isinstance(e, ValueError)
+        record_call(
+            metrics, "analyze", started, len(texts), prompt_chars=len(prompt),
+            retries=retries, parse_failures=int(parse_failed), ok=False
+        )
+        raise
+
+    results = [(None, "لم يتم إرجاع نتيجة لهذا النص")] * len(texts)
+    for item in items:
+        index = item.get("index") if isinstance(item, dict) else None
+        if not isinstance(index, int) or not 1 <= index <= len(texts):
+            continue
+        try:
+            results[index - 1] = (validate_aspects_item(item, aspects), None)
+        except ValueError as e:
+            results[index - 1] = (None, str(e))
+
+    invalid = sum(1 for percentages, _ in results if percentages is None)
+    record_call(
+        metrics, "analyze", started, len(texts), prompt_chars=len(prompt),
+        output_chars=len(output), prompt_tokens=estimate_tokens(prompt),
+        output_tokens=estimate_tokens(output), retries=retries, parse_failures=invalid
+    )
+    return results
@@ -0,0 +1,31 @@
+"""
+Arabic text normalization for matching (not for display)
+"""
+import re
+
+DIACRITICS_RE = re.compile(r'[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]')  # tashkeel and tatweel
+ALEF_RE = re.compile(r'[\u0622\u0623\u0625\u0671]')  # alef with madda or hamza, alef wasla
+PUNCTUATION_RE = re.compile(r'[^\w\s]|_')
+ARABIC_DIGITS = str.maketrans("\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669\u06F0\u06F1\u06F2\u06F3\u06F4\u06F5\u06F6\u06F7\u06F8\u06F9", "01234567890123456789")
+MASK_RE = re.compile(r'X{3,}')  # runs left by ID masking
+SPACES_RE = re.compile(r'\s+')
+
+def normalize_arabic(text):
+    """Strip diacritics and tatweel, unify alef, yaa and taa marbuta forms, drop punctuation"""
+    if not isinstance(text, str):
+        return ""
+    text = DIACRITICS_RE.sub("", text)
+    text = ALEF_RE.sub("\u0627", text)
+    text = text.replace("\u0649", "\u064A").replace("\u0629", "\u0647")  # alef maqsura to yaa, taa marbuta to haa
+    text = PUNCTUATION_RE.sub(" ", text)
+    return SPACES_RE.sub(" ", text).strip().lower()
+
+def normalize_for_dedup(text):
+    """normalize_arabic plus masked IDs collapsed and Arabic-Indic digits as ASCII
+
+    Numbers are kept: "خطأ 404" and "خطأ 500" may need different labels.
+    """
+    if not isinstance(text, str):
+        return ""
+    text = MASK_RE.sub("X", text)
+    return normalize_arabic(text.translate(ARABIC_DIGITS))
@@ -0,0 +1,61 @@
+"""
+Batch splitting and concurrent batch execution
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+def iter_batches(items, batch_size):
+    """Yield (start_index, batch) pairs of at most batch_size items"""
+    for start in range(0, len(items), batch_size):
+        yield start, items[start:start + batch_size]
+
+def _run_guarded(batch_fn, batch, control):
+    """Skip batches that were still queued when the job stopped"""
+    if control is not None:
+        control.check()
+    return batch_fn(batch)
+
+def run_batches(batch_fn, batches, max_workers=1, on_progress=None, control=None, on_tick=None, poll_interval=0.25,
+                on_result=None):
+    """Run batch_fn over batches concurrently and return results in input order
+
+    on_result(batch_index, result), on_progress(done_batches, total_batches,
+    batch_index) and on_tick() are called from the calling thread, so it is safe to update Streamlit elements
+    from them. on_tick runs while waiting; any Streamlit call made there lets a
+    rerun (e.g. a stop button) interrupt the wait. If the wait ends early for
+    any reason the job control is cancelled, queued batches are dropped and
+    in-flight calls are abandoned rather than awaited.
+    """
+    batches = list(batches)
+    results = [None] * len(batches)
+    if not batches:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches))))
+    finished = False
+    try:
+        futures = {
+            executor.submit(_run_guarded, batch_fn, batch, control): idx
+            for idx, batch in enumerate(batches)
+        }
+        pending = set(futures)
+        done_count = 0
+        while pending:
+            if control is not None:
+                control.check()
+            done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx = futures[future]
+                results[idx] = future.result()
+                done_count += 1
+                if on_result:
+                    on_result(idx, results[idx])
+                if on_progress:
+                    on_progress(done_count, len(batches), idx)
+            if not done and on_tick:
+                on_tick()
+        finished = True
+        return results
+    finally:
+        if not finished and control is not None:
+            control.cancel()
+        executor.shutdown(wait=finished, cancel_futures=True)
@@ -0,0 +1,107 @@
+"""
+Splitting of oversized texts into chunks and merging of the chunk labels
+"""
+import re
+from collections import Counter
+from src.config.constants import CLASSIFICATION_ERROR_LABEL
+from src.utils.estimator import estimate_tokens
+
+# Sentence ends: Latin and Arabic punctuation, or line breaks
+SENTENCE_END_RE = re.compile(r'(?<=[.!?؟؛])\s+|\n+')
+
+MERGE_RULES = {
+    "majority": "أغلبية الأجزاء (مرجحة بالطول)",
+    "first": "تصنيف الجزء الأول",
+}
+
+def is_long(text, max_tokens):
+    return isinstance(text, str) and estimate_tokens(text) > max_tokens
+
+def split_text(text, chunk_tokens):
+    """Split text into chunks of about chunk_tokens, preferring sentence boundaries"""
+    chunks, current, current_tokens = [], [], 0
+    for sentence in SENTENCE_END_RE.split(text):
+        tokens = estimate_tokens(sentence)
+        if tokens > chunk_tokens:
+            # A single sentence longer than a chunk is cut between words
+            pieces = _split_words(sentence, chunk_tokens)
+        else:
+            pieces = [(sentence, tokens)]
+        for piece, piece_tokens in pieces:
+            if current and current_tokens + piece_tokens > chunk_tokens:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def _split_words(sentence, chunk_tokens):
+    pieces, words, tokens = [], [], 0
+    for word in sentence.split():
+        word_tokens = estimate_tokens(word)
+        if words and tokens + word_tokens > chunk_tokens:
+            pieces.append((" ".join(words), tokens))
+            words, tokens = [], 0
+        words.append(word)
+        tokens += word_tokens
+    if words:
+        pieces.append((" ".join(words), tokens))
+    return pieces
+
+def merge_labels(labels, chunks, rule="majority"):
+    """One label for a long text from the labels of its chunks
+
+    Chunks that failed are ignored unless every chunk failed.
+    """
+    answered = [(label, chunk) for label, chunk in zip(labels, chunks) if label != CLASSIFICATION_ERROR_LABEL]
+    if not answered:
+        return CLASSIFICATION_ERROR_LABEL
+    if rule == "first":
+        return answered[0][0]
+    votes = Counter()
+    for label, chunk in answered:
+        votes[label] += estimate_tokens(chunk)
+    # Ties go to the label seen first
+    best = max(votes.values())
+    return next(label for label, _ in answered if votes[label] == best)
+
+def plan_batches(texts, batch_size, max_tokens, chunk_tokens, chunks_per_batch):
+    """Batches of texts, with oversized texts split into chunks batched on their own
+
+    Returns (batches, owners, chunked): owners[b] lists the text index behind
+    each item of batch b, and chunked maps a long text's index to its chunks.
+    """
+    short, chunked = [], {}
+    for i, text in enumerate(texts):
+        if is_long(text, max_tokens):
+            chunked[i] = split_text(text, chunk_tokens)
+        else:
+            short.append(i)
+
+    batches, owners = [], []
+    for start in range(0, len(short), batch_size):
+        indices = short[start:start + batch_size]
+        batches.append([texts[i] for i in indices])
+        owners.append(indices)
+    for i, chunks in chunked.items():
+        for start in range(0, len(chunks), chunks_per_batch):
+            part = chunks[start:start + chunks_per_batch]
+            batches.append(part)
+            owners.append([i] * len(part))
+    return batches, owners, chunked
+
+def assemble_labels(count, owners, batch_results, chunked, rule="majority"):
+    """One label per original text from per-batch results"""
+    labels = [None] * count
+    chunk_labels = {i: [] for i in chunked}
+    for indices, results in zip(owners, batch_results):
+        for i, label in zip(indices, results):
+            if i in chunked:
+                chunk_labels[i].append(label)
+            else:
+                labels[i] = label
+    for i, chunks in chunked.items():
+        labels[i] = merge_labels(chunk_labels[i], chunks, rule)
+    return labels
@@ -0,0 +1,158 @@
+"""
+Process-wide circuit breaker around model calls
+
+While the model service is healthy the breaker is closed and every call goes
+through. When too many recent calls fail or run slow it opens: calls from all
+sessions fail at once with ModelUnavailable instead of each waiting for its
+own timeout. After CIRCUIT_OPEN_SECONDS a few probe calls are let through
+(half-open); one success closes the breaker again, a failure reopens it.
+
+Only faults of the service count as failures: transport errors, 5xx answers
+and timeouts of a call that had the full MODEL_CALL_TIMEOUT. A timeout
+clipped to a job's remaining time, a rejected request or a stopped job gives
+no verdict.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from src.config.constants import (
+    CIRCUIT_FAILURE_RATE,
+    CIRCUIT_HALF_OPEN_PROBES,
+    CIRCUIT_MIN_CALLS,
+    CIRCUIT_OPEN_SECONDS,
+    CIRCUIT_SLOW_CALL,
+    CIRCUIT_WINDOW,
+    MODEL_CALL_TIMEOUT
+)
+from src.utils.job_control import JobStopped
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class ModelUnavailable(JobStopped):
+    """Raised without calling the model while the circuit breaker is open"""
+
+class GuardedCall:
+    """Details of one admitted call; the caller sets timeout to the request timeout it used"""
+    __slots__ = ("timeout",)
+
+    def __init__(self):
+        self.timeout = None
+
+def _timed_out(error):
+    # socket/asyncio timeouts, HTTP 504 / gRPC DEADLINE_EXCEEDED, and client timeouts such as ReadTimeout
+    return (isinstance(error, TimeoutError) or getattr(error, "code", None) == 504
+            or any("Timeout" in cls.__name__ for cls in type(error).__mro__))
+
+def is_service_failure(error, timeout):
+    """Whether an error from a model call says the service itself is unhealthy"""
+    if isinstance(error, JobStopped):
+        return False
+    if _timed_out(error):
+        # A deadline shortened by the caller says nothing about the service
+        return timeout is not None and timeout >= MODEL_CALL_TIMEOUT
+    code = getattr(error, "code", None)
+    return isinstance(error, OSError) or (isinstance(code, int) and code >= 500)
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker fed by the outcome of every model call"""
+
+    def __init__(self, window=CIRCUIT_WINDOW, min_calls=CIRCUIT_MIN_CALLS, failure_rate=CIRCUIT_FAILURE_RATE,
+                 slow_call=CIRCUIT_SLOW_CALL, open_seconds=CIRCUIT_OPEN_SECONDS, probes=CIRCUIT_HALF_OPEN_PROBES):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = 0
+        self.rejected = 0
+
+    def _current_state(self):
+        """State with an expired open period turned into half-open; caller holds the lock"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probing = 0
+        return self._state
+
+    def _unavailable(self):
+        self.rejected += 1
+        wait = max(1, int(self.open_seconds - (time.monotonic() - self._opened_at)))
+        return ModelUnavailable(f"خدمة النموذج متعثرة حالياً، أعد المحاولة بعد {wait} ثانية تقريباً")
+
+    def check(self):
+        """Fail fast while open, before queueing for a slot"""
+        with self._lock:
+            if self._current_state() == OPEN:
+                raise self._unavailable()
+
+    def _admit(self):
+        """Let a call through, reserving a probe when half-open; returns whether it is a probe"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return False
+            if state == HALF_OPEN and self._probing < self.probes:
+                self._probing += 1
+                return True
+            raise self._unavailable()
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def _release_probe(self):
+        with self._lock:
+            self._probing -= 1
+
+    def record(self, ok, latency, probe=False):
+        with self._lock:
+            failed = not ok or latency > self.slow_call
+            if probe:
+                self._probing -= 1
+                if failed:
+                    self._trip()
+                elif self._state == HALF_OPEN:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            if self._state != CLOSED:
+                return
+            self._outcomes.append(failed)
+            if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                self._trip()
+
+    @contextmanager
+    def guard(self):
+        """Admit one model call and record how it went; yields a GuardedCall"""
+        probe = self._admit()
+        call = GuardedCall()
+        started = time.monotonic()
+        ok = None
+        try:
+            yield call
+            ok = True
+        except Exception as e:
+            if is_service_failure(e, call.timeout):
+                ok = False
+            raise
+        finally:
+            if ok is not None:
+                self.record(ok, time.monotonic() - started, probe)
+            elif probe:
+                # No verdict (stopped job, clipped timeout, rejected request, interrupt): give the probe back
+                self._release_probe()
+
+    def stats(self):
+        with self._lock:
+            return {"state": self._current_state(), "recent_failures": sum(self._outcomes),
+                    "recent_calls": len(self._outcomes), "rejected": self.rejected}
+
+# One breaker for the whole server process
+BREAKER = CircuitBreaker()
@@ -0,0 +1,164 @@
+"""
+Process-wide coalescing of partial batches from concurrent sessions
+
+Partially filled batches (the tail of a file, a handful of texts) that share
+a model and category set are queued together and sent as one request once
+the combined batch is full or the oldest entry has waited COALESCE_MAX_WAIT
+seconds. Each caller gets back only the answers for its own texts. A
+coalescer left unused for COALESCE_IDLE_SECONDS leaves the registry and its
+flush thread exits.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from src.config.constants import (
+    COALESCE_IDLE_SECONDS,
+    COALESCE_MAX_BATCH,
+    COALESCE_MAX_INFLIGHT,
+    COALESCE_MAX_WAIT,
+    MODEL_CALL_TIMEOUT
+)
+
+_coalescers = {}
+_coalescers_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=COALESCE_MAX_INFLIGHT, thread_name_prefix="coalescer")
+
+class _Entry:
+    __slots__ = ("texts", "control", "future", "queued_at")
+
+    def __init__(self, texts, control):
+        self.texts = texts
+        self.control = control
+        self.future = Future()
+        self.queued_at = time.monotonic()
+
+class RequestCoalescer:
+    """Queue of partial batches for one (kind, model, category set) key
+
+    batch_fn(texts, timeout) must return one result per text.
+    """
+
+    def __init__(self, key, batch_fn, kind, max_batch=COALESCE_MAX_BATCH, max_wait=COALESCE_MAX_WAIT):
+        self.key = key
+        self.batch_fn = batch_fn
+        self.kind = kind
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = []
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._flush_loop, name=f"coalescer-{kind}", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts, control=None, poll_interval=0.25):
+        """Classify texts together with other callers' texts; blocks until answered
+
+        While waiting, the caller's job control is checked so a cancelled or
+        expired job leaves the queue instead of waiting for the shared
+        request, which always runs with the full MODEL_CALL_TIMEOUT.
+        """
+        entry = _Entry(list(texts), control)
+        with self._cond:
+            closed = self._closed
+            if not closed:
+                self._queue.append(entry)
+                self._cond.notify()
+        if closed:
+            # Retired while idle: go through its replacement
+            return get_coalescer(self.key, self.batch_fn, self.kind, self.max_batch).submit(texts, control, poll_interval)
+        while True:
+            try:
+                return entry.future.result(timeout=poll_interval)
+            except FutureTimeout:
+                if control is not None:
+                    try:
+                        control.check()
+                    except Exception:
+                        # Not yet sent: drop it from the queue; already sent: abandon the answer
+                        entry.future.cancel()
+                        raise
+
+    def _take_batch(self):
+        """Pop queued entries that fit in one request, oldest first"""
+        taken, size = [], 0
+        while self._queue and (not taken or size + len(self._queue[0].texts) <= self.max_batch):
+            entry = self._queue.pop(0)
+            # Cancelled entries are skipped; set_running makes later cancels a no-op
+            if entry.future.set_running_or_notify_cancel():
+                taken.append(entry)
+                size += len(entry.texts)
+        return taken
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    queued = sum(len(entry.texts) for entry in self._queue)
+                    if queued >= self.max_batch:
+                        break
+                    if self._queue:
+                        wait = self._queue[0].queued_at + self.max_wait - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    elif not self._cond.wait(COALESCE_IDLE_SECONDS):
+                        break
+                entries = self._take_batch()
+            if entries:
+                _executor.submit(self._send, entries)
+            elif self._retire_if_idle():
+                return
+
+    def _retire_if_idle(self):
+        """Leave the registry if nothing was queued meanwhile; True if retired"""
+        with _coalescers_lock, self._cond:
+            if self._queue:
+                return False
+            self._closed = True
+            if _coalescers.get(self.key) is self:
+                del _coalescers[self.key]
+            return True
+
+    def _send(self, entries):
+        """One model request for all entries; answers are split back per caller"""
+        texts = [text for entry in entries for text in entry.texts]
+        started = time.perf_counter()
+        try:
+            # Full timeout: one caller near its deadline must not cut the call short for the others;
+            # each caller enforces its own deadline while waiting in submit
+            results = self.batch_fn(texts, MODEL_CALL_TIMEOUT)
+        except Exception as e:
+            _record(entries, self.kind, started, ok=False)
+            for entry in entries:
+                entry.future.set_exception(e)
+            return
+        if len(results) != len(texts):
+            _record(entries, self.kind, started, ok=False)
+            error = Exception(f"Coalesced request returned {len(results)} results for {len(texts)} texts")
+            for entry in entries:
+                entry.future.set_exception(error)
+            return
+        _record(entries, self.kind, started, ok=True)
+        start = 0
+        for entry in entries:
+            entry.future.set_result(results[start:start + len(entry.texts)])
+            start += len(entry.texts)
+
+def _record(entries, kind, started, ok):
+    """Attribute the shared call to each caller's job metrics for its share of texts
+
+    The process-wide collector already records the call once.
+    """
+    latency = time.perf_counter() - started
+    for entry in entries:
+        metrics = entry.control.metrics if entry.control is not None else None
+        if metrics is not None:
+            metrics.record_call(kind, latency, len(entry.texts), ok=ok)
+
+def get_coalescer(key, batch_fn, kind, max_batch=COALESCE_MAX_BATCH):
+    """Coalescer shared by every session for the given key"""
+    with _coalescers_lock:
+        if key not in _coalescers:
+            _coalescers[key] = RequestCoalescer(key, batch_fn, kind, max_batch)
+        return _coalescers[key]
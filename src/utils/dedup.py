@@ -0,0 +1,81 @@
+"""
+Near-duplicate grouping of texts with MinHash and LSH banding
+
+Texts are compared after masking and normalization, so templated messages
+that differ only in a few words or masked IDs fall into one group; numbers
+are compared as written. Each group's first text is classified and its label
+reused for the rest. Off by default.
+"""
+import zlib
+from src.config.constants import DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE
+from src.utils.arabic_text import normalize_for_dedup
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+def _permutations():
+    import numpy as np
+    rng = np.random.default_rng(1)
+    a = rng.integers(1, _MERSENNE_PRIME, DEDUP_NUM_PERM, dtype=np.int64)
+    b = rng.integers(0, _MERSENNE_PRIME, DEDUP_NUM_PERM, dtype=np.int64)
+    return a, b
+
+def shingles(normalized, size=DEDUP_SHINGLE):
+    """Character shingles of a normalized text"""
+    if len(normalized) <= size:
+        return {normalized}
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+def minhash(normalized, permutations):
+    """MinHash signature over character shingles"""
+    import numpy as np
+    a, b = permutations
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) & _MERSENNE_PRIME for s in shingles(normalized)), dtype=np.int64)
+    return ((np.outer(a, hashes) + b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+def group_near_duplicates(texts, threshold):
+    """Groups of text indices whose estimated similarity is at least threshold
+
+    Every text lands in exactly one group and each group starts with its
+    representative (the first occurrence). Exact duplicates after
+    normalization are grouped without hashing.
+    """
+    import numpy as np
+
+    permutations = _permutations()
+    rows = DEDUP_NUM_PERM // DEDUP_BANDS
+    groups = []
+    exact = {}
+    buckets = {}
+    signatures = {}
+
+    for i, text in enumerate(texts):
+        normalized = normalize_for_dedup(text)
+        if not normalized:
+            groups.append([i])
+            continue
+        if normalized in exact:
+            groups[exact[normalized]].append(i)
+            continue
+
+        signature = minhash(normalized, permutations)
+        keys = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(DEDUP_BANDS)]
+        match = None
+        candidates = {g for key in keys for g in buckets.get(key, ())}
+        for g in sorted(candidates):
+            if np.mean(signatures[g] == signature) >= threshold:
+                match = g
+                break
+
+        if match is not None:
+            groups[match].append(i)
+            exact[normalized] = match
+            continue
+
+        # Only representatives are indexed, so groups cannot drift by chaining
+        g = len(groups)
+        groups.append([i])
+        exact[normalized] = g
+        signatures[g] = signature
+        for key in keys:
+            buckets.setdefault(key, []).append(g)
+    return groups
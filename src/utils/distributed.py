@@ -0,0 +1,157 @@
+"""
+Sharded classification across worker processes through the work queue
+
+The app masks the texts, places them in the queue as shards together with
+the settings and keyword rules of the run, and merges the labels as shards
+finish. Workers (scripts/queue_worker.py) run the same pipeline as a local
+run (classify_texts) on each shard they claim, under the job's settings
+rather than their own.
+"""
+import time
+from src.config.constants import (
+    CIRCUIT_OPEN_SECONDS,
+    CLASSIFICATION_ERROR_LABEL,
+    DEFAULT_MAX_WORKERS,
+    QUEUE_DB_FILE,
+    QUEUE_JOB_CHECK_INTERVAL,
+    QUEUE_LEASE_SECONDS,
+    QUEUE_POLL_INTERVAL,
+    QUEUE_WORKER_TIMEOUT
+)
+from src.utils.circuit_breaker import ModelUnavailable
+from src.utils.job_control import JobCancelled, JobControl
+from src.utils.keyword_rules import read_rules
+from src.utils.performance_settings import load_performance_settings
+from src.utils.preprocessing import mask_texts
+from src.utils.work_queue import (
+    active_workers,
+    claim_shard,
+    complete_shard,
+    default_worker_id,
+    delete_job,
+    enqueue_job,
+    fail_shard,
+    heartbeat,
+    job_exists,
+    release_shard,
+    renew_lease,
+    take_finished_shards
+)
+
+def job_settings():
+    """Settings and keyword rules that decide how texts are labeled, as stored with a job"""
+    settings = load_performance_settings()
+    return {"performance": {section: settings[section] for section in ("dedup", "long_texts")}, "rules": read_rules()}
+
+def classify_distributed(texts, categories, batch_size, shard_size, control=None, known_labels=None, aggregates=None,
+                         on_progress=None, on_tick=None, path=QUEUE_DB_FILE):
+    """Label masked texts through queue workers; same contract as classify_texts
+
+    Rows of a shard that failed on every attempt get CLASSIFICATION_ERROR_LABEL.
+    The job is removed from the queue when this returns or raises, so a
+    cancelled run stops the workers still holding its shards.
+    """
+    control = control or JobControl()
+    labels = list(known_labels) if known_labels is not None else [None] * len(texts)
+    new_rows = [i for i, label in enumerate(labels) if label is None]
+    processed = len(texts) - len(new_rows)
+    if aggregates is not None and processed:
+        aggregates.update([texts[i] for i, label in enumerate(labels) if label is not None],
+                          [label for label in labels if label is not None])
+    if not new_rows:
+        return labels
+
+    job_id, shard_count = enqueue_job([texts[i] for i in new_rows], categories, batch_size, shard_size,
+                                      job_settings(), path)
+    try:
+        done = 0
+        if on_progress:
+            on_progress(processed, done, shard_count)
+        no_workers_since = None
+        while done < shard_count:
+            control.check()
+            for shard_index, shard_labels in take_finished_shards(job_id, path):
+                rows = new_rows[shard_index * shard_size:(shard_index + 1) * shard_size]
+                shard_labels = shard_labels or [CLASSIFICATION_ERROR_LABEL] * len(rows)
+                for i, label in zip(rows, shard_labels):
+                    labels[i] = label
+                if aggregates is not None:
+                    aggregates.update([texts[i] for i in rows], shard_labels)
+                processed += len(rows)
+                done += 1
+                if on_progress:
+                    on_progress(processed, done, shard_count)
+            if done == shard_count:
+                break
+            # A queue nobody serves would otherwise wait until the job deadline
+            if active_workers(path=path):
+                no_workers_since = None
+            elif no_workers_since is None:
+                no_workers_since = time.monotonic()
+            elif time.monotonic() - no_workers_since > QUEUE_WORKER_TIMEOUT:
+                raise Exception("لا توجد عمليات معالجة نشطة لقائمة الانتظار")
+            if on_tick:
+                on_tick()
+            time.sleep(QUEUE_POLL_INTERVAL)
+        return labels
+    finally:
+        delete_job(job_id, path)
+
+def _process_shard(shard, worker_id, max_workers, path):
+    """Run the local pipeline on one shard under its job's settings, renewing the lease while it runs"""
+    from src.utils.file_processing import classify_texts
+
+    control = JobControl(deadline=None)
+    renewed = {"at": time.monotonic()}
+    checked = {"at": time.monotonic()}
+
+    def keep_lease(*_):
+        now = time.monotonic()
+        if now - checked["at"] >= QUEUE_JOB_CHECK_INTERVAL:
+            checked["at"] = now
+            # Busy workers must stay visible to active_workers, or the app gives up on the queue
+            heartbeat(worker_id, path)
+            # A deleted job (cancelled or finished in the app) stops its shards within seconds
+            if not job_exists(shard["job_id"], path):
+                control.cancel()
+                return
+        # Renew well before expiry; losing the lease means another worker owns the shard
+        if now - renewed["at"] < QUEUE_LEASE_SECONDS / 3:
+            return
+        renewed["at"] = now
+        if not renew_lease(shard, worker_id, path=path):
+            control.cancel()
+
+    # Jobs queued before settings were stored fall back to this worker's own
+    snapshot = shard["settings"]
+    settings = load_performance_settings()
+    settings.update(snapshot.get("performance", {}))
+    # Idempotent for texts the app already masked; covers producers that enqueue raw text
+    texts = mask_texts(shard["texts"])
+    return classify_texts(texts, shard["categories"], shard["batch_size"], control, max_workers,
+                          on_progress=keep_lease, on_tick=keep_lease, settings=settings, rules=snapshot.get("rules"))
+
+def run_worker(worker_id=None, max_workers=DEFAULT_MAX_WORKERS, idle_exit=None, path=QUEUE_DB_FILE):
+    """Claim and process shards until stopped, or until idle for idle_exit seconds"""
+    worker_id = worker_id or default_worker_id()
+    idle_since = time.monotonic()
+    while True:
+        heartbeat(worker_id, path)
+        shard = claim_shard(worker_id, path=path)
+        if shard is None:
+            if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                return
+            time.sleep(QUEUE_POLL_INTERVAL)
+            continue
+        try:
+            labels = _process_shard(shard, worker_id, max_workers, path)
+            complete_shard(shard, worker_id, labels, path)
+        except JobCancelled:
+            pass
+        except ModelUnavailable:
+            # Keep the shard's attempts for when the model is back
+            release_shard(shard, worker_id, path)
+            time.sleep(CIRCUIT_OPEN_SECONDS)
+        except Exception as e:
+            fail_shard(shard, worker_id, e, path)
+        idle_since = time.monotonic()
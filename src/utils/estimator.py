@@ -0,0 +1,152 @@
+"""
+Pre-flight estimates of requests, tokens and wall time for a classification run
+"""
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+from src.config.constants import (
+    ARABIC_CHARS_PER_TOKEN,
+    LATIN_CHARS_PER_TOKEN,
+    DEFAULT_CALL_LATENCY,
+    DEFAULT_SECONDS_PER_TOKEN,
+    OUTPUT_TOKEN_WEIGHT,
+    LATENCY_HISTORY_FILE,
+    LATENCY_HISTORY_MAX,
+    LATENCY_MIN_SAMPLES,
+    CONCURRENCY_OPTIONS
+)
+
+ARABIC_RE = re.compile(r'[\u0600-\u06FF\u0750-\u077F\uFB50-\uFDFF\uFE70-\uFEFF]')
+LATIN_RE = re.compile(r'[A-Za-z]')
+SYMBOL_RE = re.compile(r'[^\sA-Za-z\u0600-\u06FF\u0750-\u077F\uFB50-\uFDFF\uFE70-\uFEFF]')
+
+# Prompt text around the numbered texts, mirroring classify_texts_batch_gemini
+PROMPT_TEMPLATE = """Classify each of the following numbered texts into exactly one of these categories: {categories}
+
+Texts to classify:
+
+For your response:
+1. Return ONLY a numbered list matching the input numbers
+2. Each line should contain ONLY the number and category
+3. Format: "1. Category"
+4. No explanations or additional text"""
+LINE_NUMBER_TOKENS = 2
+
+_history_lock = threading.Lock()
+_model_cache = {}
+
+def estimate_tokens(text):
+    """Local token-length model for Arabic-heavy text
+
+    Arabic script is split into shorter pieces than Latin text; digits and
+    punctuation mostly become a token each.
+    """
+    if not isinstance(text, str) or not text:
+        return 0
+    arabic = len(ARABIC_RE.findall(text))
+    latin = len(LATIN_RE.findall(text))
+    symbols = len(SYMBOL_RE.findall(text))
+    return math.ceil(arabic / ARABIC_CHARS_PER_TOKEN + latin / LATIN_CHARS_PER_TOKEN + symbols)
+
+def record_latency_sample(kind, prompt_tokens, output_tokens, latency):
+    """Append one successful call to the persistent latency history"""
+    os.makedirs(os.path.dirname(LATENCY_HISTORY_FILE), exist_ok=True)
+    line = json.dumps({"kind": kind, "in": prompt_tokens, "out": output_tokens, "latency": round(latency, 4), "at": int(time.time())})
+    with _history_lock:
+        with open(LATENCY_HISTORY_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+def _load_samples(kind):
+    """Most recent history samples for a call kind; trims the file when it grows too long"""
+    try:
+        with _history_lock, open(LATENCY_HISTORY_FILE, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return []
+
+    if len(lines) > 2 * LATENCY_HISTORY_MAX:
+        lines = lines[-LATENCY_HISTORY_MAX:]
+        with _history_lock, open(LATENCY_HISTORY_FILE, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+    samples = []
+    for line in lines[-LATENCY_HISTORY_MAX:]:
+        try:
+            sample = json.loads(line)
+        except ValueError:
+            continue
+        if sample.get("kind") == kind:
+            samples.append(sample)
+    return samples
+
+def fit_latency_model(kind="classify"):
+    """Fit latency = base + per_token * (input + OUTPUT_TOKEN_WEIGHT * output) by least squares
+
+    Falls back to defaults until enough history exists. The fit is cached for
+    a minute since the history changes with every call.
+    """
+    cached = _model_cache.get(kind)
+    if cached and time.monotonic() - cached["at"] < 60:
+        return cached["model"]
+
+    samples = _load_samples(kind)
+    model = {"base": DEFAULT_CALL_LATENCY, "per_token": DEFAULT_SECONDS_PER_TOKEN, "samples": len(samples)}
+    if len(samples) >= LATENCY_MIN_SAMPLES:
+        xs = [s["in"] + OUTPUT_TOKEN_WEIGHT * s["out"] for s in samples]
+        ys = [s["latency"] for s in samples]
+        mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        per_token = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x if var_x > 0 else 0.0
+        if per_token > 0:
+            model["per_token"] = per_token
+            model["base"] = max(0.0, mean_y - per_token * mean_x)
+        else:
+            # Latency that does not grow with size (or sizes that never vary): use the mean
+            model["base"] = mean_y
+            model["per_token"] = 0.0
+
+    _model_cache[kind] = {"model": model, "at": time.monotonic()}
+    return model
+
+def predict_latency(model, prompt_tokens, output_tokens):
+    """Predicted seconds for one call"""
+    return model["base"] + model["per_token"] * (prompt_tokens + OUTPUT_TOKEN_WEIGHT * output_tokens)
+
+def _makespan(durations, workers):
+    """Wall time when batches are handed in order to the first free worker"""
+    finish = [0.0] * max(1, min(workers, len(durations)))
+    for duration in durations:
+        heapq.heappush(finish, heapq.heappop(finish) + duration)
+    return max(finish) if durations else 0.0
+
+def estimate_run(text_tokens, categories, batch_size, concurrency_options=CONCURRENCY_OPTIONS):
+    """Estimate batches, tokens and wall time for each concurrency option
+
+    text_tokens is the per-text token estimate, so callers can cache it per file.
+    """
+    model = fit_latency_model("classify")
+    overhead = estimate_tokens(PROMPT_TEMPLATE.format(categories=", ".join(categories)))
+    output_per_text = LINE_NUMBER_TOKENS + max((estimate_tokens(c) for c in categories), default=1)
+
+    durations = []
+    input_tokens = output_tokens = 0
+    for start in range(0, len(text_tokens), batch_size):
+        batch = text_tokens[start:start + batch_size]
+        batch_in = overhead + sum(batch) + LINE_NUMBER_TOKENS * len(batch)
+        batch_out = output_per_text * len(batch)
+        input_tokens += batch_in
+        output_tokens += batch_out
+        durations.append(predict_latency(model, batch_in, batch_out))
+
+    return {
+        "batches": len(durations),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "history_samples": model["samples"],
+        "wall_time_s": {workers: round(_makespan(durations, workers), 1) for workers in concurrency_options},
+    }
+
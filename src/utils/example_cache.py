@@ -0,0 +1,84 @@
+"""
+Precomputed classification results for bundled examples
+"""
+import hashlib
+import json
+import os
+import time
+from src.config.constants import PRECOMPUTED_DIR
+from src.utils.privacy import read_privacy_settings
+
+def file_sha256(path):
+    """Hash file contents so any edit to the example invalidates stored results"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def precomputed_key(path, categories, model_name):
+    """Build the cache key from file hash, category list, model name and ID masking patterns
+
+    Stored results hold masked text, so a change to the masking settings invalidates them.
+    """
+    payload = json.dumps(
+        {"file": file_sha256(path), "categories": list(categories), "model": model_name,
+         "id_patterns": read_privacy_settings().get("id_patterns", [])},
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _artifact_paths(name):
+    """Return manifest, results and figure paths for a precomputed example"""
+    base = os.path.join(PRECOMPUTED_DIR, name)
+    return f"{base}.manifest.json", f"{base}.results.csv", f"{base}.figure.json"
+
+def load_precomputed(name, key):
+    """Load stored results and dashboard figure if they match the given key"""
+    import pandas as pd
+    import plotly.io as pio
+
+    manifest_path, results_path, figure_path = _artifact_paths(name)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("key") != key:
+            return None
+        df = pd.read_csv(results_path)
+        with open(figure_path, "r", encoding="utf-8") as f:
+            fig = pio.from_json(f.read())
+        return df, fig
+    except (OSError, ValueError):
+        return None
+
+def _replace_atomically(path, write):
+    """Write through a temporary file so readers never see a partial artifact"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _write_text(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def save_precomputed(name, key, df, fig, categories, model_name):
+    """Store results, figure and manifest, each replaced atomically; the manifest is written last"""
+    os.makedirs(PRECOMPUTED_DIR, exist_ok=True)
+    manifest_path, results_path, figure_path = _artifact_paths(name)
+
+    _replace_atomically(results_path, lambda tmp: df.to_csv(tmp, index=False, encoding="utf-8"))
+    _replace_atomically(figure_path, lambda tmp: _write_text(tmp, fig.to_json()))
+
+    manifest = {
+        "key": key,
+        "categories": list(categories),
+        "model": model_name,
+        "rows": len(df),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    }
+    _replace_atomically(manifest_path, lambda tmp: _write_text(tmp, json.dumps(manifest, ensure_ascii=False, indent=4)))
@@ -1,25 +1,214 @@
-import pandas as pd
+import sqlite3
 import streamlit as st
-from src.utils.privacy import mask_ids
-from src.models.gemini_model import classify_texts_batch_gemini
+from src.utils.preprocessing import mask_texts
+from src.config.constants import CLASSIFICATION_ERROR_LABEL, GEMINI_MODEL_NAME, LONG_TEXT_CHUNKS_PER_BATCH
+from src.models.gemini_model import ContentError, classify_texts_batch_gemini
+from src.utils.coalescer import get_coalescer
+from src.utils.hedging import hedged_call
+from src.utils.batching import run_batches
+from src.utils.chunking import assemble_labels, plan_batches
+from src.utils.circuit_breaker import ModelUnavailable
+from src.utils.dedup import group_near_duplicates
+from src.utils.distributed import classify_distributed
+from src.utils.incremental import reuse_labels
+from src.utils.keyword_rules import label_by_rules
+from src.utils.label_index import get_label_index
+from src.utils.text_records import read_records
+from src.utils.work_queue import active_workers
+from src.utils.performance_settings import load_performance_settings
+from src.utils.job_control import JobCancelled, JobControl, JobDeadlineExceeded
+from src.utils.profiling import profile_stage
 import time
 
-def process_file(file, file_type, categories, batch_size=10, column=None, separator=None):
-    """Process either CSV or TXT file using batch classification"""
+def notify_masking(was_masked):
+    """Show the masking toast once, as mask_ids does for single texts"""
+    if was_masked and "masking_notified" not in st.session_state:
+        st.toast("تم تطبيق إخفاء المعرفات على النصوص 🔒", icon="ℹ️")
+        st.session_state.masking_notified = True
+
+def classify_batch(batch, categories, batch_size, control=None, coalesce=True):
+    """Classify one batch; partial batches share a request with other sessions
+
+    Full batches may be hedged when they run slower than recent calls.
+    """
+    if len(batch) >= batch_size or not coalesce:
+        return hedged_call(lambda: classify_texts_batch_gemini(batch, categories, control=control), "classify", control)
+    coalescer = get_coalescer(
+        ("classify", GEMINI_MODEL_NAME, tuple(categories)),
+        lambda texts, timeout: classify_texts_batch_gemini(texts, categories, timeout=timeout),
+        "classify"
+    )
+    return coalescer.submit(batch, control)
+
+def classify_isolating(batch, categories, batch_size, control=None, first_attempt=True, coalesce=True):
+    """Classify a batch; if its content fails, split it in halves until the failing texts are isolated
+
+    Only ContentError (unparseable answer, rejected input) is bisected; texts
+    that still fail on their own get CLASSIFICATION_ERROR_LABEL instead of
+    failing the whole file. Service errors (timeouts, quota, 5xx) propagate,
+    since splitting would only multiply the failing calls. Halves are sent
+    directly, without hedging or coalescing.
+    """
+    try:
+        if first_attempt:
+            return classify_batch(batch, categories, batch_size, control, coalesce)
+        return classify_texts_batch_gemini(batch, categories, control=control)
+    except ContentError:
+        if len(batch) == 1:
+            return [CLASSIFICATION_ERROR_LABEL]
+    middle = len(batch) // 2
+    return (classify_isolating(batch[:middle], categories, batch_size, control, first_attempt=False)
+            + classify_isolating(batch[middle:], categories, batch_size, control, first_attempt=False))
+
+def resolve_labels(batch, labels, categories, control=None):
+    """Map raw model labels onto the categories, re-requesting only unmatched texts
+
+    Unmatched texts are sent once more in a single strict request; labels that
+    still match no category, or whose re-request fails on its content, become
+    CLASSIFICATION_ERROR_LABEL. Service errors propagate, as in classify_isolating.
+    """
+    index = get_label_index(categories)
+    resolved = [label if label == CLASSIFICATION_ERROR_LABEL else index.resolve(label) for label in labels]
+    unmatched = [i for i, label in enumerate(resolved) if label is None]
+    if unmatched:
+        try:
+            retried = classify_texts_batch_gemini([batch[i] for i in unmatched], categories, control=control, strict=True)
+        except ContentError:
+            retried = [None] * len(unmatched)
+        for i, label in zip(unmatched, retried):
+            resolved[i] = index.resolve(label) or CLASSIFICATION_ERROR_LABEL
+    return resolved
+
+def classify_resolved(batch, categories, batch_size, control=None, coalesce=True):
+    """classify_isolating with every label resolved to one of the categories"""
+    labels = classify_isolating(batch, categories, batch_size, control, coalesce=coalesce)
+    return resolve_labels(batch, labels, categories, control)
+
+def classify_texts(texts, categories, batch_size, control=None, max_workers=1, known_labels=None, aggregates=None,
+                   on_progress=None, on_tick=None, settings=None, rules=None):
+    """Label masked texts: near-duplicate grouping, keyword rules, chunking and model batches
+
+    known_labels holds a label, or None, per text; labeled texts are skipped.
+    on_progress(processed_texts, done_batches, total_batches) is called from
+    the calling thread once before the first batch and after every batch.
+    Free of Streamlit elements, so queue workers run the same pipeline;
+    settings and rules override the performance settings and keyword rules
+    files, e.g. with the snapshot stored with a queued job.
+    """
+    control = control or JobControl()
+    total_items = len(texts)
+    settings = settings or load_performance_settings()
+    known_labels = list(known_labels) if known_labels is not None else [None] * total_items
+    new_rows = [i for i, label in enumerate(known_labels) if label is None]
+    reused = total_items - len(new_rows)
+    # Near-duplicates are classified once through their group's first text
+    if settings["dedup"]["enabled"]:
+        with profile_stage("dedup"):
+            groups = group_near_duplicates([texts[i] for i in new_rows], settings["dedup"]["threshold"])
+        groups = [[new_rows[j] for j in group] for group in groups]
+    else:
+        groups = [[i] for i in new_rows]
+    if control.metrics is not None:
+        control.metrics.record_cache_hits(total_items - len(groups))
+    unique_texts = [texts[group[0]] for group in groups]
+    # Texts matching keyword rules of a single category never reach the model
+    with profile_stage("keyword_rules"):
+        rule_labels = label_by_rules(unique_texts, categories, rules)
+    pending = [u for u, label in enumerate(rule_labels) if label is None]
+    ruled = [u for u, label in enumerate(rule_labels) if label is not None]
+
+    # Oversized texts are chunked and batched apart so they do not slow the other batches
+    long_texts = settings["long_texts"]
+    batches, owners, chunked = plan_batches(
+        [unique_texts[u] for u in pending], batch_size,
+        long_texts["max_tokens"], long_texts["chunk_tokens"], LONG_TEXT_CHUNKS_PER_BATCH
+    )
+    owners = [[pending[i] for i in indices] for indices in owners]
+    chunked = {pending[i]: chunks for i, chunks in chunked.items()}
+    # Texts finished per batch; a chunked text counts once, on its last batch
+    last_batch = {i: b for b, indices in enumerate(owners) for i in indices if i in chunked}
+    finished_texts = [
+        sum(len(groups[i]) for i in set(indices) if i not in chunked or last_batch[i] == b)
+        for b, indices in enumerate(owners)
+    ]
+    processed = reused + sum(len(groups[u]) for u in ruled)
+
+    def update_progress(done, total, idx):
+        nonlocal processed
+        processed += finished_texts[idx]
+        if on_progress:
+            on_progress(processed, done, total)
+
+    def add_to_aggregates(unique_indices, labels):
+        members = [(i, label) for u, label in zip(unique_indices, labels) for i in groups[u]]
+        aggregates.update([texts[i] for i, _ in members], [label for _, label in members])
+
+    def update_aggregates(idx, labels):
+        # Chunked texts are added once their labels are merged
+        if owners[idx][0] not in chunked:
+            add_to_aggregates(owners[idx], labels)
+
+    if aggregates is not None and reused:
+        aggregates.update([texts[i] for i, label in enumerate(known_labels) if label is not None],
+                          [label for label in known_labels if label is not None])
+    if aggregates is not None and ruled:
+        add_to_aggregates(ruled, [rule_labels[u] for u in ruled])
+    if on_progress:
+        on_progress(processed, 0, len(batches))
+
+    with profile_stage("model_wait"):
+        batch_results = run_batches(
+            # Chunks of long texts are never coalesced with other sessions' texts
+            lambda b: classify_resolved(batches[b], categories, batch_size, control, coalesce=owners[b][0] not in chunked),
+            range(len(batches)),
+            max_workers=max_workers,
+            on_progress=update_progress,
+            control=control,
+            on_tick=on_tick,
+            on_result=update_aggregates if aggregates is not None else None
+        )
+
+    unique_labels = assemble_labels(len(unique_texts), owners, batch_results, chunked, long_texts["merge_rule"])
+    for u in ruled:
+        unique_labels[u] = rule_labels[u]
+    labels = known_labels
+    for group, label in zip(groups, unique_labels):
+        for i in group:
+            labels[i] = label
+    if aggregates is not None and chunked:
+        add_to_aggregates(list(chunked), [unique_labels[u] for u in chunked])
+    return labels
+
+def process_file(file, file_type, categories, batch_size=10, column=None, separator=None, control=None, on_batch=None,
+                 max_workers=1, aggregates=None, previous_labels=None):
+    """Process either CSV or TXT file using batch classification
+
+    on_batch() is called after every finished batch, e.g. to refresh a live
+    metrics panel. If given, aggregates (DashboardAggregates) is updated with
+    each batch's texts and labels as they arrive. previous_labels ({row_hash:
+    label} of an earlier run) makes the run incremental: only new or changed
+    rows are classified.
+    """
+    import pandas as pd
+
+    control = control or JobControl()
     try:
         # Reset masking notification state for new file processing
         if "masking_notified" in st.session_state:
             del st.session_state.masking_notified
             
         if file_type == "CSV":
-            df = pd.read_csv(file)
+            with profile_stage("csv_parse"):
+                df = pd.read_csv(file)
             if column not in df.columns:
                 st.error(f"Column '{column}' not found in CSV file")
                 return None
             texts = df[column].tolist()
             # Apply privacy masking and check if any masking occurred
-            masked_texts = [mask_ids(text) for text in texts]
+            with profile_stage("masking"):
+                masked_texts = mask_texts(texts)
             was_masked = any(orig != masked for orig, masked in zip(texts, masked_texts))
+            notify_masking(was_masked)
             
             if was_masked:
                 df['original_text'] = texts
@@ -28,11 +217,12 @@ def process_file(file, file_type, categories, batch_size=10, column=None, separa
             else:
                 texts = df[column].tolist()
         else:  
-            content = file.getvalue().decode('utf-8')
-            texts = [text.strip() for text in content.split(separator) if text.strip()]
+            texts = read_records(file, separator)
             # Apply privacy masking and check if any masking occurred
-            masked_texts = [mask_ids(text) for text in texts]
+            with profile_stage("masking"):
+                masked_texts = mask_texts(texts)
             was_masked = any(orig != masked for orig, masked in zip(texts, masked_texts))
+            notify_masking(was_masked)
             
             if was_masked:
                 df = pd.DataFrame({
@@ -44,28 +234,66 @@ def process_file(file, file_type, categories, batch_size=10, column=None, separa
                 df = pd.DataFrame({'text': texts})
         
         total_items = len(texts)
-        classifications = []
+        # Rows labeled by the previous run keep their label
+        reused_labels = reuse_labels(texts, previous_labels, categories)
+        if previous_labels:
+            reused = sum(1 for label in reused_labels if label is not None)
+            st.info(f"أُعيد استخدام تصنيف {reused:,} من {total_items:,} صف من التشغيل السابق، وسيُصنف {total_items - reused:,} صف جديد أو معدل")
         
         progress_bar = st.progress(0)
         status_text = st.empty()
         start_time = time.time()
+        state = {"processed": 0}
         
-        for i in range(0, total_items, batch_size):
-            batch_texts = texts[i:i+batch_size]
-            batch_classifications = classify_texts_batch_gemini(batch_texts, categories)
-            classifications.extend(batch_classifications)
-            
-            progress = (i + batch_size) / total_items
+        def update_progress(processed, done, total):
+            state["processed"] = processed
+            if total and not done:
+                show_elapsed()
+                return
+            progress = done / total if total else 1.0
             progress_bar.progress(min(progress, 1.0))
             
             elapsed_time = time.time() - start_time
             estimated_total_time = elapsed_time / progress if progress > 0 else 0
             remaining_time = estimated_total_time - elapsed_time
-            status_text.text(f"تمت معالجة {min(i + batch_size, total_items)}/{total_items} نص. الوقت المتبقي: {remaining_time:.1f} ثانية")
+            status_text.text(f"تمت معالجة {processed}/{total_items} نص. الوقت المتبقي: {remaining_time:.1f} ثانية")
+            if on_batch:
+                on_batch()
+        
+        def show_elapsed():
+            # Touching an element while waiting lets a stop-button rerun interrupt the job
+            status_text.text(f"تمت معالجة {state['processed']}/{total_items} نص. الوقت المنقضي: {time.time() - start_time:.1f} ثانية")
         
-        df['classification'] = classifications
+        distributed = load_performance_settings()["distributed"]
+        use_queue = distributed["enabled"] and total_items >= distributed["min_rows"]
+        if use_queue:
+            try:
+                use_queue = bool(active_workers())
+            except sqlite3.Error:
+                # An unreachable or locked queue must not fail a job that can run locally
+                use_queue = False
+        if use_queue:
+            # Large jobs are sharded to the queue workers when any are running
+            df['classification'] = classify_distributed(
+                texts, categories, batch_size, distributed["shard_size"], control,
+                known_labels=reused_labels, aggregates=aggregates, on_progress=update_progress, on_tick=show_elapsed
+            )
+        else:
+            df['classification'] = classify_texts(
+                texts, categories, batch_size, control, max_workers,
+                known_labels=reused_labels, aggregates=aggregates, on_progress=update_progress, on_tick=show_elapsed
+            )
+        failed = int((df['classification'] == CLASSIFICATION_ERROR_LABEL).sum())
+        if failed:
+            st.warning(f"تعذر تصنيف {failed} من {len(df)} نص، وتم وسمها بـ \"{CLASSIFICATION_ERROR_LABEL}\"")
         return df, was_masked
         
+    except JobCancelled:
+        st.warning("تم إيقاف التصنيف قبل اكتماله")
+        return None, False
+    except (JobDeadlineExceeded, ModelUnavailable) as e:
+        st.error(str(e))
+        return None, False
     except Exception as e:
         st.error(f"Error processing file: {str(e)}")
         return None, False 
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Hedged model requests: send a duplicate when a call runs unusually long
+
+The hedge delay is a latency percentile of recent successful calls of the
+same kind, counted from when the first call was granted its model slot, so
+time spent queueing in the scheduler never triggers a hedge. Hedges are
+limited to a fraction of all hedgeable calls, so the extra load on the quota
+stays bounded.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from src.config.constants import HEDGE_MIN_DELAY, HEDGE_MIN_SAMPLES, HEDGE_WINDOW, SCHEDULER_MAX_CONCURRENCY
+from src.utils.metrics import PROCESS_METRICS, _quantile
+from src.utils.performance_settings import load_performance_settings
+from src.utils.scheduler import on_slot_granted
+
+_executor = ThreadPoolExecutor(max_workers=2 * SCHEDULER_MAX_CONCURRENCY, thread_name_prefix="hedge")
+_budget_lock = threading.Lock()
+_budget = {"calls": 0, "hedges": 0}
+
+def hedge_delay(kind, percentile):
+    """Seconds to wait before hedging, or None until enough calls were seen"""
+    latencies = PROCESS_METRICS.recent_latencies(kind, HEDGE_WINDOW)
+    if len(latencies) < HEDGE_MIN_SAMPLES:
+        return None
+    return max(HEDGE_MIN_DELAY, _quantile(sorted(latencies), percentile))
+
+def _take_hedge(budget):
+    """Spend one hedge if the process is still under its budget"""
+    with _budget_lock:
+        if _budget["hedges"] >= budget * _budget["calls"]:
+            return False
+        _budget["hedges"] += 1
+        return True
+
+def _submit_timed(fn, granted):
+    """Run fn on the hedge pool, noting in granted["at"] when it first gets a model slot"""
+    def mark():
+        granted.setdefault("at", time.monotonic())
+
+    def run():
+        with on_slot_granted(mark):
+            return fn()
+    return _executor.submit(run)
+
+def hedged_call(fn, kind, control=None, poll_interval=0.25):
+    """Run fn(), sending a second fn() if the first is slower than the hedge delay
+
+    Returns the first successful answer; the slower call is abandoned. If
+    hedging is disabled or there is no latency history yet, fn runs inline.
+    """
+    settings = load_performance_settings()["hedging"]
+    if not settings["enabled"]:
+        return fn()
+    delay = hedge_delay(kind, settings["percentile"])
+    with _budget_lock:
+        _budget["calls"] += 1
+    if delay is None:
+        return fn()
+
+    granted = {}
+    pending = {_submit_timed(fn, granted)}
+    hedged = False
+    last_error = None
+    while pending:
+        if control is not None:
+            control.check()
+        done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                return future.result()
+            except Exception as e:
+                # The other attempt, if any, may still succeed
+                last_error = e
+        started = granted.get("at")
+        if (not hedged and started is not None and time.monotonic() - started >= delay and pending
+                and _take_hedge(settings["budget"])):
+            hedged = True
+            PROCESS_METRICS.record_hedge()
+            if control is not None and control.metrics is not None:
+                control.metrics.record_hedge()
+            pending.add(_executor.submit(fn))
+    raise last_error
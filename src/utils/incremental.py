@@ -0,0 +1,39 @@
+"""
+Labels from an earlier run, keyed by the hash of each masked text
+
+An incremental run classifies only rows whose masked text was not labeled
+before; the rest take their previous label.
+"""
+from src.utils.results_db import labels_by_hash, row_hash
+
+def labels_from_export(file, text_column):
+    """{row_hash: label} from a downloaded results CSV
+
+    The export holds the masked texts, so hashes match those of a new run.
+    """
+    import pandas as pd
+    df = pd.read_csv(file, encoding="utf-8-sig")
+    if "classification" not in df.columns:
+        raise Exception("ملف النتائج السابق لا يحتوي على عمود التصنيف classification")
+    if text_column not in df.columns:
+        raise Exception(f"ملف النتائج السابق لا يحتوي على العمود '{text_column}'")
+    return {row_hash(text): label for text, label in zip(df[text_column].tolist(), df["classification"].astype(str).tolist())}
+
+def labels_from_run(run_id):
+    """{row_hash: label} from a run in the results store"""
+    return labels_by_hash(run_id)
+
+def reuse_labels(texts, previous_labels, categories):
+    """Previous label per text, or None where the text is new, changed or was not classified
+
+    Labels outside the current categories, including the error label, are
+    not reused, so those rows are classified again.
+    """
+    if not previous_labels:
+        return [None] * len(texts)
+    allowed = set(categories)
+    labels = []
+    for text in texts:
+        label = previous_labels.get(row_hash(text))
+        labels.append(label if label in allowed else None)
+    return labels
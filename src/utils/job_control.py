@@ -0,0 +1,81 @@
+"""
+Deadlines and user cancellation for long-running model jobs
+"""
+import threading
+import time
+import streamlit as st
+from src.config.constants import DEFAULT_JOB_DEADLINE, PRIORITY_BULK
+
+class JobStopped(Exception):
+    """Base class for jobs that stopped before finishing"""
+
+class JobCancelled(JobStopped):
+    """Raised when the user cancels a running job"""
+
+class JobDeadlineExceeded(JobStopped):
+    """Raised when a job runs past its overall deadline"""
+
+def current_session_id():
+    """Id of the Streamlit session running this script, or None outside one"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+    except Exception:
+        return None
+    return ctx.session_id if ctx is not None else None
+
+class JobControl:
+    """Cancellation flag, overall deadline, metrics and scheduling identity shared by all calls of one job"""
+
+    def __init__(self, deadline=DEFAULT_JOB_DEADLINE, metrics=None, session_id=None, priority=PRIORITY_BULK):
+        self._cancelled = threading.Event()
+        self.expires_at = time.monotonic() + deadline if deadline else None
+        self.metrics = metrics
+        self.session_id = session_id or current_session_id()
+        self.priority = priority
+
+    def cancel(self):
+        """Stop the job; queued batches are skipped and waiters return immediately"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def remaining(self):
+        """Seconds left before the job deadline, or None without a deadline"""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.monotonic()
+
+    def check(self):
+        """Raise if the job was cancelled or its deadline has passed"""
+        if self.cancelled:
+            raise JobCancelled("تم إيقاف المهمة")
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise JobDeadlineExceeded("تجاوزت المهمة المهلة المحددة")
+
+    def call_timeout(self, timeout):
+        """Per-call timeout clipped to what is left of the job deadline"""
+        self.check()
+        remaining = self.remaining()
+        return timeout if remaining is None else max(0.1, min(timeout, remaining))
+
+def start_job(key, deadline=DEFAULT_JOB_DEADLINE, metrics=None, priority=PRIORITY_BULK):
+    """Create a job control and keep it in session state so the UI can cancel it"""
+    control = JobControl(deadline, metrics, priority=priority)
+    st.session_state[key] = control
+    return control
+
+def cancel_job(key):
+    """Button callback: cancel the job stored under key"""
+    control = st.session_state.get(key)
+    if control is not None:
+        control.cancel()
+        st.session_state.job_cancelled_notice = True
+
+def show_cancel_notice():
+    """Show a toast once after the user cancelled a job"""
+    if st.session_state.pop("job_cancelled_notice", False):
+        st.toast("تم إيقاف المعالجة", icon="⏹️")
@@ -0,0 +1,123 @@
+"""
+Keyword rules that label formulaic texts without calling the model
+
+Each rule ties a category to keywords or phrases. All keywords of the
+selected categories are compiled into one Aho-Corasick automaton, so a text
+is scanned once however many rules exist. Keywords and texts are compared
+with the definite article and its attached prefixes dropped, so "عقد" also
+matches "العقد" and "بالعقد". A text is labeled locally only when every
+keyword it contains belongs to the same category.
+"""
+import json
+import os
+from collections import deque
+from src.config.constants import CLASSIFICATION_RULES_FILE
+from src.utils.arabic_text import normalize_arabic
+from src.utils.label_index import DEFINITE_ARTICLE_RE
+
+# Automata shared by all sessions, keyed by rules file version and categories
+_matcher_cache = {}
+
+class AhoCorasick:
+    """Multi-pattern matcher reporting the values of all patterns found in a text"""
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [set()]
+        for pattern, value in patterns:
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state].add(value)
+
+        # Breadth-first failure links (root children fail to the root); each state
+        # inherits the outputs of its fallback
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] |= self._out[self._fail[child]]
+
+    def values(self, text):
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            found |= self._out[state]
+        return found
+
+def read_rules():
+    """Read keyword rules from file; a missing or broken file means no rules"""
+    try:
+        if os.path.exists(CLASSIFICATION_RULES_FILE):
+            with open(CLASSIFICATION_RULES_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+    except Exception:
+        pass
+    return {"rules": []}
+
+def save_rules(settings):
+    """Write keyword rules and drop the compiled automata"""
+    os.makedirs(os.path.dirname(CLASSIFICATION_RULES_FILE), exist_ok=True)
+    with open(CLASSIFICATION_RULES_FILE, "w", encoding="utf-8") as f:
+        json.dump(settings, f, ensure_ascii=False, indent=4)
+    _matcher_cache.clear()
+
+def _normalize(text):
+    """Normalized form with the definite article dropped from every word"""
+    return DEFINITE_ARTICLE_RE.sub("", normalize_arabic(text))
+
+def _pattern(keyword):
+    # Padded with spaces so keywords only match whole words
+    normalized = _normalize(keyword)
+    return f" {normalized} " if normalized else None
+
+def get_rule_matcher(categories, rules=None):
+    """Automaton over the rules of the given categories, or None if there are none
+
+    rules (as read_rules returns them) replaces the rules file. Compiled once
+    per rules version and category set.
+    """
+    if rules is not None:
+        version = json.dumps(rules, ensure_ascii=False, sort_keys=True)
+    else:
+        try:
+            version = os.path.getmtime(CLASSIFICATION_RULES_FILE)
+        except OSError:
+            version = None
+    key = (version, tuple(categories))
+    if key not in _matcher_cache:
+        selected = set(categories)
+        patterns = [
+            (pattern, rule["category"])
+            for rule in (rules if rules is not None else read_rules())["rules"] if rule["category"] in selected
+            for pattern in map(_pattern, rule["keywords"]) if pattern
+        ]
+        if len(_matcher_cache) >= 32:
+            _matcher_cache.clear()
+        _matcher_cache[key] = AhoCorasick(patterns) if patterns else None
+    return _matcher_cache[key]
+
+def label_by_rules(texts, categories, rules=None):
+    """Category per text when its keyword matches are unambiguous, else None"""
+    matcher = get_rule_matcher(categories, rules)
+    if matcher is None:
+        return [None] * len(texts)
+    labels = []
+    for text in texts:
+        found = matcher.values(f" {_normalize(text)} ") if isinstance(text, str) else ()
+        labels.append(next(iter(found)) if len(found) == 1 else None)
+    return labels
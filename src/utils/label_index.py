@@ -0,0 +1,67 @@
+"""
+Mapping of model label variants back to the canonical category names
+
+The index is built once per category set: every category is expanded into
+its normalized forms (diacritics, alef forms, "ال" prefixes and punctuation
+removed) plus their single-deletion variants, so a returned label resolves
+with a few dictionary lookups instead of a comparison against each category.
+"""
+import re
+from functools import lru_cache
+from src.utils.arabic_text import normalize_arabic
+
+# Echoes of the prompt format: "Category: X", "التصنيف: X", quotes and markdown
+ECHO_PREFIX_RE = re.compile(r'^\s*(?:category|label|class|الفئة|التصنيف|الفئه)\s*[:：-]\s*', re.IGNORECASE)
+DEFINITE_ARTICLE_RE = re.compile(r'(?<!\S)(?:وال|بال|فال|كال|لل|ال)(?=\S{2,})')
+
+def _key(text):
+    """Normalized form with the definite article dropped from every word"""
+    return DEFINITE_ARTICLE_RE.sub("", normalize_arabic(text)).replace(" ", "")
+
+def _deletions(key):
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+class LabelIndex:
+    """Constant-time lookup from a raw model label to a category, or None"""
+
+    def __init__(self, categories):
+        self.categories = list(categories)
+        self._exact = {category: category for category in self.categories}
+        self._normalized = {}
+        fuzzy = {}
+        for category in self.categories:
+            key = _key(category)
+            self._normalized.setdefault(key, category)
+            # Short keys would match too many unrelated words at edit distance one
+            if len(key) >= 4:
+                for variant in _deletions(key) | {key}:
+                    fuzzy.setdefault(variant, set()).add(category)
+        # A variant shared by two categories is ambiguous and never resolves
+        self._fuzzy = {variant: next(iter(owners)) for variant, owners in fuzzy.items() if len(owners) == 1}
+
+    def resolve(self, label):
+        if not isinstance(label, str):
+            return None
+        if label in self._exact:
+            return label
+        label = ECHO_PREFIX_RE.sub("", label.replace("**", "")).strip()
+        key = _key(label)
+        if not key:
+            return None
+        if key in self._normalized:
+            return self._normalized[key]
+        if len(key) < 4:
+            return None
+        # Symmetric deletion: one substitution, insertion or deletion away
+        if key in self._fuzzy:
+            return self._fuzzy[key]
+        matches = {self._fuzzy[variant] for variant in _deletions(key) if variant in self._fuzzy}
+        return matches.pop() if len(matches) == 1 else None
+
+@lru_cache(maxsize=32)
+def _cached_index(categories):
+    return LabelIndex(categories)
+
+def get_label_index(categories):
+    """Index for a category set, built once per process"""
+    return _cached_index(tuple(categories))
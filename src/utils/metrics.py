@@ -0,0 +1,183 @@
+"""
+Structured metrics for model calls with JSON and Prometheus export
+"""
+import json
+import threading
+import time
+from collections import deque
+import streamlit as st
+from src.config.constants import METRICS_MAX_RECORDS, METRICS_PREFIX
+from src.utils.estimator import record_latency_sample
+
+LATENCY_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+COUNTER_FIELDS = ("texts", "prompt_chars", "output_chars", "prompt_tokens", "output_tokens",
+                  "retries", "parse_failures", "cache_hits", "hedges")
+
+def _quantile(ordered, q):
+    """Nearest-rank quantile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, min(len(ordered) - 1, round(q * len(ordered)) - 1))]
+
+class MetricsCollector:
+    """Thread-safe store of per-call metrics with exact running totals
+
+    Individual calls are kept in a bounded window for percentiles; counters
+    cover every call ever recorded.
+    """
+
+    def __init__(self, max_records=METRICS_MAX_RECORDS):
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=max_records)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+            self._totals = {field: 0 for field in COUNTER_FIELDS}
+            self._calls = {}
+            # Latency sum and count over every call, for the Prometheus summary
+            self._latency_sum = 0.0
+            self._latency_count = 0
+            self._first_start = None
+            self._last_end = None
+
+    def record_call(self, kind, latency, batch_size, prompt_chars=0, output_chars=0,
+                    prompt_tokens=0, output_tokens=0, retries=0, parse_failures=0, ok=True):
+        """Record one model call; latency is in seconds"""
+        end = time.time()
+        record = {
+            "kind": kind,
+            "latency": latency,
+            "batch_size": batch_size,
+            "prompt_chars": prompt_chars,
+            "output_chars": output_chars,
+            "prompt_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+            "retries": retries,
+            "parse_failures": parse_failures,
+            "ok": ok,
+            "end": end,
+        }
+        with self._lock:
+            self._records.append(record)
+            status = "ok" if ok else "error"
+            self._calls[(kind, status)] = self._calls.get((kind, status), 0) + 1
+            self._latency_sum += latency
+            self._latency_count += 1
+            self._totals["texts"] += batch_size
+            self._totals["prompt_chars"] += prompt_chars
+            self._totals["output_chars"] += output_chars
+            self._totals["prompt_tokens"] += prompt_tokens
+            self._totals["output_tokens"] += output_tokens
+            self._totals["retries"] += retries
+            self._totals["parse_failures"] += parse_failures
+            start = end - latency
+            self._first_start = start if self._first_start is None else min(self._first_start, start)
+            self._last_end = end
+
+    def recent_latencies(self, kind, limit):
+        """Latencies of the last `limit` successful calls of a kind, oldest first"""
+        with self._lock:
+            latencies = [r["latency"] for r in reversed(self._records) if r["kind"] == kind and r["ok"]][:limit]
+        return latencies[::-1]
+
+    def record_cache_hits(self, count=1):
+        """Count texts answered without a model call"""
+        with self._lock:
+            self._totals["cache_hits"] += count
+
+    def record_hedge(self):
+        """Count a duplicate request sent for a slow call"""
+        with self._lock:
+            self._totals["hedges"] += 1
+
+    def summary(self):
+        """Aggregate percentiles, throughput and totals"""
+        with self._lock:
+            records = list(self._records)
+            totals = dict(self._totals)
+            calls = dict(self._calls)
+            window = (self._last_end - self._first_start) if self._first_start is not None else 0
+
+        latencies = sorted(r["latency"] for r in records)
+        batch_sizes = [r["batch_size"] for r in records]
+        total_calls = sum(calls.values())
+        errors = sum(count for (_, status), count in calls.items() if status == "error")
+        return {
+            "calls": total_calls,
+            "errors": errors,
+            "calls_by_kind": {f"{kind}:{status}": count for (kind, status), count in calls.items()},
+            "latency_s": {f"p{int(q * 100)}": round(_quantile(latencies, q), 3) for q in LATENCY_QUANTILES},
+            "latency_mean_s": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "mean_batch_size": round(sum(batch_sizes) / len(batch_sizes), 1) if batch_sizes else 0.0,
+            "throughput_texts_s": round(totals["texts"] / window, 2) if window > 0 else 0.0,
+            "calls_per_min": round(total_calls * 60 / window, 1) if window > 0 else 0.0,
+            **totals,
+        }
+
+    def to_json(self):
+        """Summary plus the raw call window as JSON"""
+        with self._lock:
+            records = list(self._records)
+        return json.dumps({"summary": self.summary(), "calls": records}, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix=METRICS_PREFIX):
+        """Render the summary in Prometheus text exposition format"""
+        summary = self.summary()
+        with self._lock:
+            calls = dict(self._calls)
+            latency_sum, latency_count = self._latency_sum, self._latency_count
+
+        lines = [
+            f"# HELP {prefix}_model_calls_total Model calls by kind and status.",
+            f"# TYPE {prefix}_model_calls_total counter",
+        ]
+        for (kind, status), count in sorted(calls.items()):
+            lines.append(f'{prefix}_model_calls_total{{kind="{kind}",status="{status}"}} {count}')
+
+        lines += [
+            f"# HELP {prefix}_model_call_latency_seconds Model call latency; quantiles over the recent window, sum and count over all calls.",
+            f"# TYPE {prefix}_model_call_latency_seconds summary",
+        ]
+        for q in LATENCY_QUANTILES:
+            lines.append(f'{prefix}_model_call_latency_seconds{{quantile="{q}"}} {summary["latency_s"][f"p{int(q * 100)}"]}')
+        lines.append(f"{prefix}_model_call_latency_seconds_sum {round(latency_sum, 6)}")
+        lines.append(f"{prefix}_model_call_latency_seconds_count {latency_count}")
+
+        for field in COUNTER_FIELDS:
+            lines += [
+                f"# TYPE {prefix}_{field}_total counter",
+                f"{prefix}_{field}_total {summary[field]}",
+            ]
+        lines += [
+            f"# TYPE {prefix}_throughput_texts_per_second gauge",
+            f"{prefix}_throughput_texts_per_second {summary['throughput_texts_s']}",
+            f"# TYPE {prefix}_batch_size_mean gauge",
+            f"{prefix}_batch_size_mean {summary['mean_batch_size']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+# Process-wide collector shared by all sessions
+PROCESS_METRICS = MetricsCollector()
+
+def get_session_metrics():
+    """Per-session collector kept in session state"""
+    if "performance_metrics" not in st.session_state:
+        st.session_state.performance_metrics = MetricsCollector()
+    return st.session_state.performance_metrics
+
+def record_call(metrics, kind, started, batch_size, **fields):
+    """Record a finished call into the process collector and an optional job collector
+
+    Successful calls also feed the latency history used by pre-flight estimates.
+    """
+    latency = time.perf_counter() - started
+    PROCESS_METRICS.record_call(kind, latency, batch_size, **fields)
+    if metrics is not None:
+        metrics.record_call(kind, latency, batch_size, **fields)
+    if fields.get("ok", True) and fields.get("prompt_tokens"):
+        try:
+            record_latency_sample(kind, fields["prompt_tokens"], fields.get("output_tokens", 0), latency)
+        except OSError:
+            pass
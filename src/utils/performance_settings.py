@@ -0,0 +1,45 @@
+"""
+Performance settings shared by all sessions
+"""
+import copy
+import json
+import os
+from src.config.constants import PERFORMANCE_SETTINGS_FILE, DEFAULT_PERFORMANCE_SETTINGS
+
+# Parsed settings keyed by the settings file version
+_settings_cache = {}
+
+def _merge_defaults(settings):
+    """Fill missing sections and keys from the defaults"""
+    merged = copy.deepcopy(DEFAULT_PERFORMANCE_SETTINGS)
+    for section, values in settings.items():
+        if isinstance(values, dict) and isinstance(merged.get(section), dict):
+            merged[section].update(values)
+        else:
+            merged[section] = values
+    return merged
+
+def load_performance_settings():
+    """Load performance settings, re-reading the file only when it changes"""
+    try:
+        version = os.path.getmtime(PERFORMANCE_SETTINGS_FILE)
+    except OSError:
+        version = None
+    if "settings" not in _settings_cache or _settings_cache.get("version") != version:
+        settings = {}
+        if version is not None:
+            try:
+                with open(PERFORMANCE_SETTINGS_FILE, "r", encoding="utf-8") as f:
+                    settings = json.load(f)
+            except (OSError, ValueError):
+                settings = {}
+        _settings_cache["settings"] = _merge_defaults(settings)
+        _settings_cache["version"] = version
+    return copy.deepcopy(_settings_cache["settings"])
+
+def save_performance_settings(settings):
+    """Write performance settings and drop the cached copy"""
+    os.makedirs(os.path.dirname(PERFORMANCE_SETTINGS_FILE), exist_ok=True)
+    with open(PERFORMANCE_SETTINGS_FILE, "w", encoding="utf-8") as f:
+        json.dump(settings, f, ensure_ascii=False, indent=4)
+    _settings_cache.clear()
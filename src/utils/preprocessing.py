@@ -0,0 +1,106 @@
+"""
+CPU-bound preprocessing (masking, tokenization, word counts) across processes
+
+Large text columns are cut into chunks of plain strings and handed to a
+shared process pool chunk by chunk, so workers never receive a whole
+DataFrame. This module must stay import-light: pool workers import it.
+"""
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from src.config.constants import PARALLEL_MIN_ROWS, PARALLEL_CHUNK_SIZE, STOP_WORDS
+
+ARABIC_WORD_RE = re.compile(r'[؀-ۿ]+')
+
+_pool = None
+_worker_patterns = {}
+
+def get_pool():
+    """Process pool shared by all sessions, created on first large input
+
+    Workers are spawned rather than forked; the Streamlit server process runs
+    many threads, which fork does not copy safely.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=get_context("spawn"))
+    return _pool
+
+def _map_chunks(fn, *chunked_args):
+    """Run fn over argument chunks in the pool, inline if the pool has died"""
+    global _pool
+    try:
+        return list(get_pool().map(fn, *chunked_args))
+    except BrokenProcessPool:
+        _pool = None
+        return [fn(*args) for args in zip(*chunked_args)]
+
+def _chunks(items, size=PARALLEL_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _compiled(pattern_specs):
+    """Compile (regex, length) specs once per worker process"""
+    if pattern_specs not in _worker_patterns:
+        _worker_patterns[pattern_specs] = [(re.compile(regex), "X" * length) for regex, length in pattern_specs]
+    return _worker_patterns[pattern_specs]
+
+def mask_chunk(texts, pattern_specs):
+    """Worker: mask one chunk of texts; same substitutions as mask_ids"""
+    patterns = _compiled(pattern_specs)
+    masked = []
+    for text in texts:
+        if isinstance(text, str):
+            for regex, replacement in patterns:
+                text = regex.sub(replacement, text)
+        masked.append(text)
+    return masked
+
+def tokenize(text, min_length=2):
+    """Arabic words of at least min_length letters, without stop words"""
+    if not isinstance(text, str):
+        return []
+    return [w for w in ARABIC_WORD_RE.findall(text) if len(w) >= min_length and w not in STOP_WORDS]
+
+def count_words_chunk(texts, labels, min_length=2):
+    """Worker: word counts per label for one chunk"""
+    counts = {}
+    for text, label in zip(texts, labels):
+        counts.setdefault(label, Counter()).update(tokenize(text, min_length))
+    return counts
+
+def _pattern_specs():
+    """Current privacy patterns as picklable (regex, length) pairs"""
+    from src.utils.privacy import get_compiled_patterns
+    return tuple((p["regex"].pattern, p["length"]) for p in get_compiled_patterns())
+
+def mask_texts(texts, min_rows=PARALLEL_MIN_ROWS):
+    """Mask a list of texts, in parallel when the input is large"""
+    specs = _pattern_specs()
+    if not specs:
+        return list(texts)
+    if len(texts) < min_rows:
+        return mask_chunk(texts, specs)
+
+    chunks = list(_chunks(texts))
+    masked = []
+    for part in _map_chunks(mask_chunk, chunks, [specs] * len(chunks)):
+        masked.extend(part)
+    return masked
+
+def count_words_by_label(texts, labels, min_length=2, min_rows=PARALLEL_MIN_ROWS):
+    """Word Counter per label, in parallel when the input is large"""
+    texts, labels = list(texts), list(labels)
+    if len(texts) < min_rows:
+        return count_words_chunk(texts, labels, min_length)
+
+    text_chunks = list(_chunks(texts))
+    label_chunks = list(_chunks(labels))
+    merged = {}
+    for part in _map_chunks(count_words_chunk, text_chunks, label_chunks, [min_length] * len(text_chunks)):
+        for label, counter in part.items():
+            merged.setdefault(label, Counter()).update(counter)
+    return merged
@@ -1,9 +1,13 @@
 import re
 import json
+import time
 import streamlit as st
-from src.config.constants import SETTINGS_FILE, PRIVACY_CACHE_KEY
+from src.config.constants import SETTINGS_FILE, PRIVACY_CACHE_KEY, PRIVACY_RECHECK_SECONDS
 import os
 
+# Compiled patterns shared by all sessions, keyed by the settings file version
+_patterns_cache = {}
+
 def clear_privacy_cache():
     """Clear privacy settings cache from session state"""
     if PRIVACY_CACHE_KEY in st.session_state:
@@ -12,16 +16,23 @@ def clear_privacy_cache():
         del st.session_state["compiled_patterns"]
     if "masking_notified" in st.session_state:
         del st.session_state["masking_notified"]
+    _patterns_cache.clear()
+
+def read_privacy_settings():
+    """Read privacy settings from file without touching session state"""
+    try:
+        if os.path.exists(SETTINGS_FILE):
+            with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+    except Exception:
+        pass
+    return {"id_patterns": []}
 
 def load_privacy_settings():
     """Load privacy settings from file with caching"""
     try:
         if PRIVACY_CACHE_KEY not in st.session_state:
-            if os.path.exists(SETTINGS_FILE):
-                with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-                    st.session_state[PRIVACY_CACHE_KEY] = json.load(f)
-            else:
-                st.session_state[PRIVACY_CACHE_KEY] = {"id_patterns": []}
+            st.session_state[PRIVACY_CACHE_KEY] = read_privacy_settings()
         return st.session_state[PRIVACY_CACHE_KEY]
     except Exception:
         return {"id_patterns": []}
@@ -40,28 +51,49 @@ def compile_patterns(settings):
         })
     return compiled_patterns
 
+def get_compiled_patterns():
+    """Compile ID patterns once per settings file version
+
+    Cached at process level rather than in session state so masking also
+    works outside a Streamlit session (benchmarks, build scripts, workers).
+    The file is checked at most every PRIVACY_RECHECK_SECONDS; saves from the
+    settings page clear the cache immediately.
+    """
+    now = time.monotonic()
+    if "patterns" in _patterns_cache and now - _patterns_cache["checked_at"] < PRIVACY_RECHECK_SECONDS:
+        return _patterns_cache["patterns"]
+    try:
+        version = os.path.getmtime(SETTINGS_FILE)
+    except OSError:
+        version = None
+    if "patterns" not in _patterns_cache or _patterns_cache.get("version") != version:
+        _patterns_cache["patterns"] = compile_patterns(read_privacy_settings())
+        _patterns_cache["version"] = version
+    _patterns_cache["checked_at"] = now
+    return _patterns_cache["patterns"]
+
+def mask_text(text, compiled_patterns):
+    """Apply compiled ID patterns to a single text"""
+    if not isinstance(text, str):
+        return text
+    for pattern in compiled_patterns:
+        text = pattern["regex"].sub("X" * pattern["length"], text)
+    return text
+
 def mask_ids(text):
     """Mask IDs in text based on privacy settings with improved performance"""
     if not isinstance(text, str):
         return text
-        
-    settings = load_privacy_settings()
-    
-    # Get or compile patterns
-    if "compiled_patterns" not in st.session_state:
-        st.session_state.compiled_patterns = compile_patterns(settings)
     
-    if not st.session_state.compiled_patterns:
+    compiled_patterns = get_compiled_patterns()
+    if not compiled_patterns:
         return text
     
-    masked_text = text
-    original_text = text
-    for pattern in st.session_state.compiled_patterns:
-        masked_text = pattern["regex"].sub("X" * pattern["length"], masked_text)
+    masked_text = mask_text(text, compiled_patterns)
     
     # Check if any masking was applied
-    if masked_text != original_text and "masking_notified" not in st.session_state:
+    if masked_text != text and "masking_notified" not in st.session_state:
         st.toast("تم تطبيق إخفاء المعرفات على النصوص 🔒", icon="ℹ️")
         st.session_state.masking_notified = True
     
-    return masked_text 
\ No newline at end of file
+    return masked_text
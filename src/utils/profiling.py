@@ -0,0 +1,195 @@
+"""
+Opt-in profiling of Streamlit reruns and named pipeline stages
+
+Enable with the ARABIC_CLASSIFIER_PROFILE environment variable
+("sampling", "deterministic", or "0" to force off) or from the settings
+page. Each profiled rerun writes to PROFILE_DIR:
+
+- <run>.folded       collapsed stacks for flamegraph.pl / speedscope; sampled
+                     call stacks in sampling mode, stage timings (ms) otherwise
+- <run>.prof         cProfile stats (deterministic mode), for pstats/snakeviz
+- <run>.stages.json  wall time per named stage
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from src.config.constants import PROFILE_DIR, PROFILE_ENV_VAR
+from src.utils.performance_settings import load_performance_settings
+
+PROFILE_MODES = ("sampling", "deterministic")
+
+# Active run per script thread; Streamlit serves each session on its own thread
+_local = threading.local()
+
+# cProfile hooks are process-wide on Python 3.12+, so only one session at a time
+# profiles deterministically; the others fall back to sampling
+_deterministic_lock = threading.Lock()
+
+def profiling_config():
+    """Resolve (enabled, mode, interval_ms); the environment variable wins over settings"""
+    settings = load_performance_settings()["profiling"]
+    enabled = bool(settings.get("enabled"))
+    mode = settings.get("mode", "sampling")
+    env_value = os.getenv(PROFILE_ENV_VAR, "").strip().lower()
+    if env_value:
+        enabled = env_value not in ("0", "false", "off", "no")
+        if env_value in PROFILE_MODES:
+            mode = env_value
+    if mode not in PROFILE_MODES:
+        mode = "sampling"
+    return enabled, mode, max(1, int(settings.get("interval_ms", 5)))
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Background thread sampling one thread's call stack into folded counts"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            stage = getattr(_ProfileRun.by_thread.get(self.thread_id), "current_stage", None)
+            root = [f"stage:{stage}"] if stage else []
+            self.stacks[";".join(root + labels[::-1])] += 1
+
+class _ProfileRun:
+    """State of one profiled rerun"""
+    by_thread = {}
+
+    def __init__(self, name, mode, interval_ms):
+        self.name = name
+        self.mode = mode
+        self.stages = []
+        self.current_stage = None
+        self.started = time.perf_counter()
+        self.thread_id = threading.get_ident()
+        self.profiler = cProfile.Profile() if mode == "deterministic" else None
+        self.sampler = StackSampler(self.thread_id, interval_ms / 1000) if mode == "sampling" else None
+
+    def start(self):
+        _ProfileRun.by_thread[self.thread_id] = self
+        if self.profiler:
+            self.profiler.enable()
+        if self.sampler:
+            self.sampler.start()
+
+    def stop(self):
+        if self.profiler:
+            self.profiler.disable()
+            _deterministic_lock.release()
+        if self.sampler:
+            self.sampler.stop()
+        _ProfileRun.by_thread.pop(self.thread_id, None)
+        self.total = time.perf_counter() - self.started
+
+    def _stage_folded(self):
+        """Stage self-times in ms as folded stacks, so nested stages are not double counted"""
+        totals = Counter()
+        for stage in self.stages:
+            totals[stage["stage"]] += stage["seconds"]
+        self_times = Counter(totals)
+        for path, seconds in totals.items():
+            parent = path.rpartition("/")[0]
+            if parent:
+                self_times[parent] -= seconds
+        self_times[""] = self.total - sum(seconds for path, seconds in totals.items() if "/" not in path)
+
+        folded = Counter()
+        for path, seconds in self_times.items():
+            stack = ";".join([self.name] + (path.split("/") if path else []))
+            ms = round(seconds * 1000)
+            if ms > 0:
+                folded[stack] += ms
+        return folded
+
+    def save(self):
+        """Write profile artifacts and return the common path prefix"""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+        prefix = os.path.join(PROFILE_DIR, f"{stamp}_{self.name}_{self.thread_id}")
+
+        with open(f"{prefix}.stages.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {"run": self.name, "mode": self.mode, "total_s": round(self.total, 6), "stages": self.stages},
+                f, ensure_ascii=False, indent=2
+            )
+
+        if self.profiler:
+            self.profiler.dump_stats(f"{prefix}.prof")
+            folded = self._stage_folded()
+        else:
+            folded = self.sampler.stacks
+
+        with open(f"{prefix}.folded", "w", encoding="utf-8") as f:
+            for stack, count in folded.most_common():
+                f.write(f"{stack} {count}\n")
+        return prefix
+
+@contextmanager
+def profile_run(name):
+    """Profile one script rerun when profiling is enabled; no-op otherwise"""
+    enabled, mode, interval_ms = profiling_config()
+    if not enabled or getattr(_local, "run", None) is not None:
+        yield
+        return
+
+    if mode == "deterministic" and not _deterministic_lock.acquire(blocking=False):
+        mode = "sampling"
+    run = _ProfileRun(name, mode, interval_ms)
+    try:
+        run.start()
+    except BaseException:
+        _ProfileRun.by_thread.pop(run.thread_id, None)
+        if run.profiler:
+            _deterministic_lock.release()
+        raise
+    _local.run = run
+    try:
+        yield
+    finally:
+        run.stop()
+        _local.run = None
+        run.save()
+
+@contextmanager
+def profile_stage(name):
+    """Time a named pipeline stage inside the active profiled run"""
+    run = getattr(_local, "run", None)
+    if run is None:
+        yield
+        return
+
+    parent = run.current_stage
+    run.current_stage = f"{parent}/{name}" if parent else name
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.stages.append({"stage": run.current_stage, "seconds": round(time.perf_counter() - started, 6)})
+        run.current_stage = parent
@@ -0,0 +1,72 @@
+"""
+Compact session storage for classification results
+
+Labels are stored as categoricals and text columns as Arrow-backed strings
+when pyarrow is installed. Derived artifacts (CSV export, dashboard figure)
+are built once per result set instead of on every rerun.
+"""
+import sys
+import streamlit as st
+
+LABEL_COLUMNS = ("classification", "dominant_aspect")
+
+def _string_dtype():
+    """Arrow-backed strings if pyarrow is available, else None"""
+    import pandas as pd
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    return pd.StringDtype("pyarrow")
+
+def compact_results(df):
+    """Return df with categorical label columns and compact text columns
+
+    Without pyarrow, text values are interned so repeated strings share one
+    object.
+    """
+    string_dtype = _string_dtype()
+    columns = {}
+    for name in df.columns:
+        column = df[name]
+        if name in LABEL_COLUMNS:
+            columns[name] = column.astype("category")
+        elif column.dtype == object and column.map(lambda v: v is None or isinstance(v, str)).all():
+            if string_dtype is not None:
+                columns[name] = column.astype(string_dtype)
+            else:
+                columns[name] = column.map(lambda v: sys.intern(v) if isinstance(v, str) else v)
+    return df.assign(**columns) if columns else df
+
+def memory_bytes(df):
+    """Deep in-memory size of a DataFrame"""
+    return int(df.memory_usage(deep=True, index=True).sum()) if df is not None else 0
+
+def set_results(key, df):
+    """Store a compacted result set and drop artifacts derived from the previous one"""
+    st.session_state[key] = compact_results(df) if df is not None else None
+    st.session_state[f"{key}_artifacts"] = {}
+
+def get_artifact(key, name, build):
+    """Build an artifact of the current result set once, e.g. its CSV export"""
+    artifacts = st.session_state.setdefault(f"{key}_artifacts", {})
+    if name not in artifacts:
+        artifacts[name] = build(st.session_state[key])
+    return artifacts[name]
+
+def to_csv_bytes(df):
+    """CSV export with a BOM for Excel compatibility"""
+    return df.to_csv(index=False, encoding='utf-8-sig', quoting=1).encode('utf-8-sig')
+
+def session_memory_report():
+    """Approximate bytes held by result DataFrames and cached exports in this session, by key"""
+    import pandas as pd
+    report = {}
+    for key, value in st.session_state.items():
+        if isinstance(value, pd.DataFrame):
+            report[key] = memory_bytes(value)
+        elif isinstance(value, dict) and str(key).endswith("_artifacts"):
+            size = sum(len(v) for v in value.values() if isinstance(v, bytes))
+            if size:
+                report[key] = size
+    return report
@@ -0,0 +1,163 @@
+"""
+Persistent SQLite store of classification runs and their results
+
+Only masked texts are stored; original texts never leave the session.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from src.config.constants import RESULTS_DB_FILE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    source_name TEXT,
+    text_column TEXT,
+    categories TEXT NOT NULL,
+    category_key TEXT NOT NULL,
+    model_name TEXT,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    was_masked INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    row_index INTEGER NOT NULL,
+    row_hash TEXT NOT NULL,
+    text TEXT,
+    label TEXT,
+    PRIMARY KEY (run_id, row_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_run_label ON results(run_id, label);
+CREATE INDEX IF NOT EXISTS idx_results_label ON results(label);
+CREATE INDEX IF NOT EXISTS idx_results_row_hash ON results(row_hash);
+CREATE INDEX IF NOT EXISTS idx_runs_category_key ON runs(category_key, created_at);
+"""
+
+_initialized = set()
+
+def connect(path=RESULTS_DB_FILE):
+    """Open a connection, creating the schema on first use in this process"""
+    if path not in _initialized:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    if path not in _initialized:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA)
+        _initialized.add(path)
+    return conn
+
+def row_hash(text):
+    """Stable hash of a (masked) text"""
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+
+def category_key(categories):
+    """Hash of the category set, independent of order"""
+    payload = json.dumps(sorted(categories), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def save_run(df, text_column, categories, source_name=None, model_name=None, was_masked=False):
+    """Store a finished run and return its id"""
+    texts = df[text_column].tolist()
+    labels = df["classification"].astype(str).tolist()
+    with closing(connect()) as conn, conn:
+        cursor = conn.execute(
+            "INSERT INTO runs (created_at, source_name, text_column, categories, category_key, model_name, row_count, was_masked) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), source_name, text_column, json.dumps(list(categories), ensure_ascii=False),
+             category_key(categories), model_name, len(texts), int(bool(was_masked)))
+        )
+        run_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO results (run_id, row_index, row_hash, text, label) VALUES (?, ?, ?, ?, ?)",
+            ((run_id, i, row_hash(text), None if text is None else str(text), label)
+             for i, (text, label) in enumerate(zip(texts, labels)))
+        )
+    return run_id
+
+def list_runs(limit=100):
+    """Most recent runs first"""
+    with closing(connect()) as conn:
+        rows = conn.execute("SELECT * FROM runs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+    runs = []
+    for row in rows:
+        run = dict(row)
+        run["categories"] = json.loads(run["categories"])
+        runs.append(run)
+    return runs
+
+def list_runs_for_categories(categories, limit=20):
+    """Most recent runs over the same category set, via the category-key index"""
+    with closing(connect()) as conn:
+        rows = conn.execute(
+            "SELECT * FROM runs WHERE category_key = ? ORDER BY created_at DESC LIMIT ?",
+            (category_key(categories), limit)
+        ).fetchall()
+    runs = []
+    for row in rows:
+        run = dict(row)
+        run["categories"] = json.loads(run["categories"])
+        runs.append(run)
+    return runs
+
+def labels_by_hash(run_id):
+    """{row_hash: label} of a stored run"""
+    with closing(connect()) as conn:
+        rows = conn.execute("SELECT row_hash, label FROM results WHERE run_id = ?", (run_id,)).fetchall()
+    return {hash_: label for hash_, label in rows}
+
+def get_run(run_id):
+    """Run metadata, or None"""
+    with closing(connect()) as conn:
+        row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    if row is None:
+        return None
+    run = dict(row)
+    run["categories"] = json.loads(run["categories"])
+    return run
+
+def _where(run_id, labels=None, search=None):
+    clauses, params = ["run_id = ?"], [run_id]
+    if labels:
+        clauses.append(f"label IN ({', '.join('?' * len(labels))})")
+        params.extend(labels)
+    if search:
+        # The search term is literal text: its % and _ are not wildcards
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        clauses.append("text LIKE ? ESCAPE '\\'")
+        params.append(f"%{escaped}%")
+    return " AND ".join(clauses), params
+
+def label_counts(run_id, labels=None, search=None):
+    """{label: count} for a run, using the (run_id, label) index"""
+    where, params = _where(run_id, labels, search)
+    with closing(connect()) as conn:
+        rows = conn.execute(f"SELECT label, COUNT(*) FROM results WHERE {where} GROUP BY label", params).fetchall()
+    return {label: count for label, count in rows}
+
+SORT_COLUMNS = {"row": "row_index", "label": "label", "text": "text"}
+
+def load_results(run_id, labels=None, search=None, limit=None, offset=0, order_by="row", ascending=True):
+    """Stored rows of a run as a DataFrame with text and classification columns"""
+    import pandas as pd
+    where, params = _where(run_id, labels, search)
+    direction = "ASC" if ascending else "DESC"
+    query = (f"SELECT row_index, text, label AS classification FROM results WHERE {where} "
+             f"ORDER BY {SORT_COLUMNS[order_by]} {direction}, row_index {direction}")
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    with closing(connect()) as conn:
+        df = pd.read_sql_query(query, conn, params=params)
+    df["classification"] = df["classification"].astype("category")
+    return df
+
+def delete_run(run_id):
+    """Remove a run and its results"""
+    with closing(connect()) as conn, conn:
+        conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
@@ -0,0 +1,147 @@
+"""
+Fair-share admission of model calls across sessions
+
+Every model request takes a slot first. Interactive calls are served before
+bulk ones, and part of the capacity is held back for them; among waiting
+calls of the same class, the session with the fewest calls in flight goes
+first, so one large file cannot starve other users. Each session may hold at
+most SCHEDULER_SESSION_LIMIT slots at a time.
+"""
+import itertools
+import threading
+from contextlib import contextmanager
+from src.config.constants import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    SCHEDULER_INTERACTIVE_RESERVE,
+    SCHEDULER_MAX_CONCURRENCY,
+    SCHEDULER_SESSION_LIMIT
+)
+from src.utils.circuit_breaker import BREAKER
+
+SHARED_SESSION = "shared"
+
+# Per-thread callback run when a model slot is granted, so callers can time the call without its queueing
+_grant_hooks = threading.local()
+
+class _Waiter:
+    __slots__ = ("session_id", "priority", "seq", "granted")
+
+    def __init__(self, session_id, priority, seq):
+        self.session_id = session_id
+        self.priority = priority
+        self.seq = seq
+        self.granted = threading.Event()
+
+class FairScheduler:
+    """Slots for concurrent model calls with priority classes and per-session fairness"""
+
+    def __init__(self, capacity=SCHEDULER_MAX_CONCURRENCY, session_limit=SCHEDULER_SESSION_LIMIT,
+                 interactive_reserve=SCHEDULER_INTERACTIVE_RESERVE):
+        self.capacity = capacity
+        self.session_limit = session_limit
+        self.interactive_reserve = min(interactive_reserve, capacity - 1)
+        self._lock = threading.Lock()
+        self._waiters = []
+        self._in_flight = {}
+        self._seq = itertools.count()
+
+    def _running(self):
+        return sum(self._in_flight.values())
+
+    def _eligible(self, waiter, running):
+        if self._in_flight.get(waiter.session_id, 0) >= self.session_limit:
+            return False
+        limit = self.capacity if waiter.priority == PRIORITY_INTERACTIVE else self.capacity - self.interactive_reserve
+        return running < limit
+
+    def _dispatch(self):
+        """Grant free slots to the best eligible waiters; caller holds the lock"""
+        while self._waiters:
+            running = self._running()
+            eligible = [w for w in self._waiters if self._eligible(w, running)]
+            if not eligible:
+                return
+            waiter = min(eligible, key=lambda w: (w.priority, self._in_flight.get(w.session_id, 0), w.seq))
+            self._waiters.remove(waiter)
+            self._in_flight[waiter.session_id] = self._in_flight.get(waiter.session_id, 0) + 1
+            waiter.granted.set()
+
+    def acquire(self, session_id, priority=PRIORITY_BULK, control=None, poll_interval=0.25):
+        """Block until a slot is granted; a stopped job gives up its place in the queue"""
+        waiter = _Waiter(session_id or SHARED_SESSION, priority, next(self._seq))
+        with self._lock:
+            self._waiters.append(waiter)
+            self._dispatch()
+        while not waiter.granted.wait(poll_interval):
+            if control is None:
+                continue
+            try:
+                control.check()
+            except Exception:
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                        raise
+                # Granted while being cancelled: hand the slot back
+                self.release(waiter.session_id)
+                raise
+        return waiter.session_id
+
+    def release(self, session_id):
+        with self._lock:
+            count = self._in_flight.get(session_id, 0) - 1
+            if count > 0:
+                self._in_flight[session_id] = count
+            else:
+                self._in_flight.pop(session_id, None)
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, session_id, priority=PRIORITY_BULK, control=None):
+        granted = self.acquire(session_id, priority, control)
+        try:
+            yield
+        finally:
+            self.release(granted)
+
+    def stats(self):
+        """Slots in use and calls waiting, per session"""
+        with self._lock:
+            waiting = {}
+            for waiter in self._waiters:
+                waiting[waiter.session_id] = waiting.get(waiter.session_id, 0) + 1
+            return {"running": self._running(), "capacity": self.capacity,
+                    "in_flight": dict(self._in_flight), "waiting": waiting}
+
+# One scheduler for the whole server process
+SCHEDULER = FairScheduler()
+
+@contextmanager
+def on_slot_granted(callback):
+    """Call callback() each time this thread is granted a model slot inside the block"""
+    previous = getattr(_grant_hooks, "callback", None)
+    _grant_hooks.callback = callback
+    try:
+        yield
+    finally:
+        _grant_hooks.callback = previous
+
+@contextmanager
+def model_slot(control=None, session_id=None, priority=None):
+    """Slot for one model request, taking session and priority from the job control
+
+    The circuit breaker is consulted before queueing and again once the slot
+    is granted, so no call waits in line for a service that is known to be down.
+    Yields the breaker's GuardedCall; set its timeout to the request timeout.
+    """
+    if control is not None:
+        session_id = session_id or control.session_id
+        priority = control.priority if priority is None else priority
+    BREAKER.check()
+    with SCHEDULER.slot(session_id, PRIORITY_BULK if priority is None else priority, control):
+        callback = getattr(_grant_hooks, "callback", None)
+        if callback is not None:
+            callback()
+        with BREAKER.guard() as call:
+            yield call
@@ -0,0 +1,36 @@
+"""
+Startup timing: time from the start of a page's script run to its first render
+"""
+import logging
+import sys
+import threading
+import time
+
+# Captured when the first page imports this module, i.e. at process cold start
+PROCESS_T0 = time.perf_counter()
+_first_renders = {}
+
+# Start of the current script run; each run executes on one script thread
+_run = threading.local()
+
+logger = logging.getLogger(__name__)
+
+def mark_script_start():
+    """Note the start of a script run; call first thing in every page"""
+    _run.started = time.perf_counter()
+
+def mark_first_render(page):
+    """Record (once per process) how long the page took to render the first time"""
+    if page in _first_renders:
+        return
+    _first_renders[page] = time.perf_counter() - getattr(_run, "started", PROCESS_T0)
+    logger.info("Startup: first render of %s after %.3fs", page, _first_renders[page])
+
+def startup_report():
+    """First-render times and which heavy dependencies are loaded so far"""
+    heavy = ["pandas", "plotly", "google.generativeai"]
+    return {
+        "first_render_s": {page: round(seconds, 3) for page, seconds in _first_renders.items()},
+        "loaded_modules": {name: name in sys.modules for name in heavy},
+        "uptime_s": round(time.perf_counter() - PROCESS_T0, 1),
+    }
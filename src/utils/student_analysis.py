@@ -0,0 +1,97 @@
+"""
+Batched multi-aspect analysis of student experiences
+"""
+from src.config.constants import DEFAULT_MAX_WORKERS, GEMINI_MODEL_NAME, STUDENT_BATCH_SIZE
+from src.models.gemini_model import analyze_experiences_batch_gemini, get_gemini_model
+from src.utils.batching import iter_batches, run_batches
+from src.utils.chunking import is_long
+from src.utils.coalescer import get_coalescer
+from src.utils.file_processing import notify_masking
+from src.utils.performance_settings import load_performance_settings
+from src.utils.job_control import JobControl, JobStopped
+from src.utils.preprocessing import mask_texts
+from src.utils.profiling import profile_stage
+
+def _analyze_batch(texts, aspects, model, control, coalesce=False):
+    """Analyze one batch, retrying only the items that failed validation
+
+    With coalesce, the first attempt shares a request with other sessions.
+    """
+    try:
+        if coalesce:
+            coalescer = get_coalescer(
+                ("analyze", GEMINI_MODEL_NAME, tuple(aspects)),
+                lambda batch, timeout: analyze_experiences_batch_gemini(batch, aspects, model, timeout=timeout),
+                "analyze",
+                max_batch=STUDENT_BATCH_SIZE
+            )
+            results = coalescer.submit(texts, control)
+        else:
+            results = analyze_experiences_batch_gemini(texts, aspects, model, control)
+    except JobStopped:
+        raise
+    except Exception as e:
+        return [(None, f"فشل التحليل: {str(e)}")] * len(texts)
+
+    failed = [i for i, (percentages, _) in enumerate(results) if percentages is None]
+    if failed and len(failed) < len(texts):
+        try:
+            retried = analyze_experiences_batch_gemini([texts[i] for i in failed], aspects, model, control, retries=1)
+            for i, result in zip(failed, retried):
+                if result[0] is not None:
+                    results[i] = result
+        except JobStopped:
+            raise
+        except Exception:
+            pass
+    return results
+
+def analyze_experiences(texts, aspects, batch_size=STUDENT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                        on_progress=None, control=None, on_tick=None):
+    """Analyze many experiences and return a per-row table of aspect percentages"""
+    import pandas as pd
+
+    control = control or JobControl()
+    with profile_stage("masking"):
+        masked_texts = mask_texts(texts)
+    was_masked = any(orig != masked for orig, masked in zip(texts, masked_texts))
+    notify_masking(was_masked)
+
+    # Resolve the cached model once here; worker threads have no script context
+    model = get_gemini_model()
+    valid = [i for i, text in enumerate(masked_texts) if isinstance(text, str) and text.strip()]
+    # Oversized experiences are analyzed one per request so they do not slow other batches
+    max_tokens = load_performance_settings()["long_texts"]["max_tokens"]
+    long_texts = {i for i in valid if is_long(masked_texts[i], max_tokens)}
+    batches = [batch for _, batch in iter_batches([i for i in valid if i not in long_texts], batch_size)]
+    batches += [[i] for i in sorted(long_texts)]
+
+    with profile_stage("model_wait"):
+        batch_results = run_batches(
+            lambda batch: _analyze_batch(
+                [masked_texts[i] for i in batch], aspects, model, control,
+                coalesce=len(batch) < batch_size and batch[0] not in long_texts
+            ),
+            batches,
+            max_workers=max_workers,
+            on_progress=on_progress,
+            control=control,
+            on_tick=on_tick
+        )
+
+    rows = [{aspect: None for aspect in aspects} for _ in texts]
+    errors = ["نص فارغ"] * len(texts)
+    for batch, results in zip(batches, batch_results):
+        for i, (percentages, error) in zip(batch, results):
+            errors[i] = error
+            if percentages is not None:
+                rows[i] = percentages
+
+    df = pd.DataFrame({'text': masked_texts})
+    if was_masked:
+        df.insert(0, 'original_text', texts)
+    df = pd.concat([df, pd.DataFrame(rows, columns=list(aspects))], axis=1)
+    percentages = df[list(aspects)].astype(float)
+    df['dominant_aspect'] = percentages.fillna(-1).idxmax(axis=1).where(percentages.notna().any(axis=1))
+    df['error'] = errors
+    return df, was_masked
@@ -0,0 +1,63 @@
+"""
+Streaming split of uploaded TXT files into records
+
+The file is read in fixed-size byte chunks and decoded incrementally, so a
+UTF-8 character or a multi-character separator cut across two chunks is
+handled, and no full decoded copy of the file is ever held. Each chunk is
+searched for separators once, so splitting stays linear in the file size.
+"""
+import codecs
+from itertools import islice
+from src.config.constants import TXT_READ_CHUNK, TXT_STATS_BATCH
+
+def iter_records(file, separator, chunk_size=TXT_READ_CHUNK):
+    """Yield the stripped, non-empty records of a binary file, split on separator"""
+    if not separator:
+        raise ValueError("empty separator")
+    file.seek(0)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    tail = ""
+    while True:
+        chunk = file.read(chunk_size)
+        # The unsearched tail can only hold the start of a separator cut across chunks
+        search_from = max(0, len(tail) - len(separator) + 1)
+        tail += decoder.decode(chunk, final=not chunk)
+        start = 0
+        while True:
+            end = tail.find(separator, search_from)
+            if end < 0:
+                break
+            record = tail[start:end].strip()
+            if record:
+                yield record
+            start = search_from = end + len(separator)
+        # Everything after the last separator may continue in the next chunk
+        tail = tail[start:]
+        if not chunk:
+            break
+    tail = tail.strip()
+    if tail:
+        yield tail
+
+def read_records(file, separator, limit=None):
+    """First limit records (all if None) as a list"""
+    return list(islice(iter_records(file, separator), limit))
+
+def record_stats(file, separator, measure, prepare=None):
+    """Record count, mean length in characters and measure(record) per record, in one pass
+
+    prepare(records), e.g. mask_texts, is applied to batches of records before
+    they are measured, so the measure sees what will be sent to the model.
+    """
+    count = 0
+    chars = 0
+    measured = []
+    records = iter_records(file, separator)
+    while True:
+        batch = list(islice(records, TXT_STATS_BATCH))
+        if not batch:
+            break
+        count += len(batch)
+        chars += sum(len(record) for record in batch)
+        measured.extend(measure(record) for record in (prepare(batch) if prepare else batch))
+    return {"count": count, "avg_length": chars / count if count else 0, "measured": measured}
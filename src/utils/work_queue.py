@@ -0,0 +1,203 @@
+"""
+Durable SQLite queue of classification shards shared by the app and workers
+
+A large job is split into shards of masked texts. Workers claim shards
+under a time-limited lease, renew it while they work and write the labels
+back; a shard whose lease runs out is handed to another worker, up to
+QUEUE_MAX_ATTEMPTS times. Each job carries a snapshot of the settings and
+keyword rules it was started with, so every worker labels it the same way.
+
+The queue relies on SQLite file locking. It is safe for the app and workers
+on one host, or on a volume whose locking is known to be reliable; network
+filesystems such as NFS or SMB often are not, and can corrupt the database.
+"""
+import json
+import os
+import socket
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from src.config.constants import QUEUE_DB_FILE, QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS, QUEUE_WORKER_TIMEOUT
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    categories TEXT NOT NULL,
+    batch_size INTEGER NOT NULL,
+    shard_count INTEGER NOT NULL,
+    settings TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS shards (
+    job_id INTEGER NOT NULL REFERENCES jobs(job_id) ON DELETE CASCADE,
+    shard_index INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    texts TEXT NOT NULL,
+    labels TEXT,
+    worker_id TEXT,
+    leased_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    PRIMARY KEY (job_id, shard_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_shards_status ON shards(status, leased_until);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    host TEXT,
+    pid INTEGER,
+    last_seen REAL NOT NULL,
+    shards_done INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_initialized = set()
+
+def connect(path=QUEUE_DB_FILE):
+    """Open a connection in autocommit mode, creating the schema on first use in this process"""
+    if path not in _initialized:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA foreign_keys = ON")
+    if path not in _initialized:
+        conn.executescript(SCHEMA)
+        # Queues created before jobs carried a settings snapshot
+        if "settings" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN settings TEXT NOT NULL DEFAULT '{}'")
+        _initialized.add(path)
+    return conn
+
+@contextmanager
+def _write(path):
+    """Connection holding the write lock for one transaction"""
+    with closing(connect(path)) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def enqueue_job(texts, categories, batch_size, shard_size, settings=None, path=QUEUE_DB_FILE):
+    """Store a job as shards of at most shard_size texts; returns (job_id, shard_count)
+
+    settings is a JSON-serializable snapshot handed to every worker with the job's shards.
+    """
+    shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+    with _write(path) as conn:
+        cursor = conn.execute(
+            "INSERT INTO jobs (created_at, categories, batch_size, shard_count, settings) VALUES (?, ?, ?, ?, ?)",
+            (time.time(), json.dumps(list(categories), ensure_ascii=False), batch_size, len(shards),
+             json.dumps(settings or {}, ensure_ascii=False))
+        )
+        job_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO shards (job_id, shard_index, texts) VALUES (?, ?, ?)",
+            ((job_id, i, json.dumps(shard, ensure_ascii=False)) for i, shard in enumerate(shards))
+        )
+    return job_id, len(shards)
+
+def claim_shard(worker_id, lease_seconds=QUEUE_LEASE_SECONDS, path=QUEUE_DB_FILE):
+    """Lease the oldest pending (or abandoned) shard, or return None"""
+    now = time.time()
+    with _write(path) as conn:
+        # Shards abandoned too often are given up on; the job marks their rows as failed
+        conn.execute(
+            "UPDATE shards SET status = 'failed', error = 'lease expired' "
+            "WHERE status = 'running' AND leased_until < ? AND attempts >= ?",
+            (now, QUEUE_MAX_ATTEMPTS)
+        )
+        row = conn.execute(
+            "SELECT s.job_id, s.shard_index, s.texts, j.categories, j.batch_size, j.settings FROM shards s JOIN jobs j USING (job_id) "
+            "WHERE s.status = 'pending' OR (s.status = 'running' AND s.leased_until < ?) "
+            "ORDER BY s.job_id, s.shard_index LIMIT 1",
+            (now,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE shards SET status = 'running', worker_id = ?, leased_until = ?, attempts = attempts + 1 "
+            "WHERE job_id = ? AND shard_index = ?",
+            (worker_id, now + lease_seconds, row[0], row[1])
+        )
+    return {"job_id": row[0], "shard_index": row[1], "texts": json.loads(row[2]),
+            "categories": json.loads(row[3]), "batch_size": row[4], "settings": json.loads(row[5])}
+
+def renew_lease(shard, worker_id, lease_seconds=QUEUE_LEASE_SECONDS, path=QUEUE_DB_FILE):
+    """Extend a lease; False if the shard was taken over or its job is gone"""
+    with closing(connect(path)) as conn:
+        cursor = conn.execute(
+            "UPDATE shards SET leased_until = ? WHERE job_id = ? AND shard_index = ? AND worker_id = ? AND status = 'running'",
+            (time.time() + lease_seconds, shard["job_id"], shard["shard_index"], worker_id)
+        )
+        return cursor.rowcount == 1
+
+def complete_shard(shard, worker_id, labels, path=QUEUE_DB_FILE):
+    """Write a shard's labels back; ignored if the lease was lost meanwhile"""
+    with _write(path) as conn:
+        cursor = conn.execute(
+            "UPDATE shards SET status = 'done', labels = ?, texts = '[]' "
+            "WHERE job_id = ? AND shard_index = ? AND worker_id = ? AND status = 'running'",
+            (json.dumps(labels, ensure_ascii=False), shard["job_id"], shard["shard_index"], worker_id)
+        )
+        if cursor.rowcount:
+            conn.execute("UPDATE workers SET shards_done = shards_done + 1 WHERE worker_id = ?", (worker_id,))
+
+def fail_shard(shard, worker_id, error, path=QUEUE_DB_FILE):
+    """Return a shard to the queue, or give up on it after QUEUE_MAX_ATTEMPTS"""
+    with _write(path) as conn:
+        conn.execute(
+            "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, error = ? "
+            "WHERE job_id = ? AND shard_index = ? AND worker_id = ? AND status = 'running'",
+            (QUEUE_MAX_ATTEMPTS, str(error)[:1000], shard["job_id"], shard["shard_index"], worker_id)
+        )
+
+def release_shard(shard, worker_id, path=QUEUE_DB_FILE):
+    """Hand a shard back without counting the attempt, e.g. while the model is unavailable"""
+    with _write(path) as conn:
+        conn.execute(
+            "UPDATE shards SET status = 'pending', attempts = attempts - 1 "
+            "WHERE job_id = ? AND shard_index = ? AND worker_id = ? AND status = 'running'",
+            (shard["job_id"], shard["shard_index"], worker_id)
+        )
+
+def take_finished_shards(job_id, path=QUEUE_DB_FILE):
+    """Remove and return [(shard_index, labels or None for a failed shard)] of finished shards"""
+    with _write(path) as conn:
+        rows = conn.execute(
+            "SELECT shard_index, status, labels FROM shards WHERE job_id = ? AND status IN ('done', 'failed')",
+            (job_id,)
+        ).fetchall()
+        if rows:
+            conn.execute("DELETE FROM shards WHERE job_id = ? AND status IN ('done', 'failed')", (job_id,))
+    return [(index, json.loads(labels) if status == "done" else None) for index, status, labels in rows]
+
+def job_exists(job_id, path=QUEUE_DB_FILE):
+    """False once the job was deleted, e.g. because the app cancelled it"""
+    with closing(connect(path)) as conn:
+        return conn.execute("SELECT 1 FROM jobs WHERE job_id = ?", (job_id,)).fetchone() is not None
+
+def delete_job(job_id, path=QUEUE_DB_FILE):
+    """Drop a job and its remaining shards; workers still on it lose their lease"""
+    with _write(path) as conn:
+        conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+def heartbeat(worker_id, path=QUEUE_DB_FILE):
+    with closing(connect(path)) as conn:
+        conn.execute(
+            "INSERT INTO workers (worker_id, host, pid, last_seen) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(worker_id) DO UPDATE SET last_seen = excluded.last_seen",
+            (worker_id, socket.gethostname(), os.getpid(), time.time())
+        )
+
+def active_workers(timeout=QUEUE_WORKER_TIMEOUT, path=QUEUE_DB_FILE):
+    """Workers seen within timeout seconds, with their completed shard counts"""
+    with closing(connect(path)) as conn:
+        rows = conn.execute(
+            "SELECT worker_id, host, shards_done FROM workers WHERE last_seen >= ? ORDER BY worker_id",
+            (time.time() - timeout,)
+        ).fetchall()
+    return [{"worker_id": worker_id, "host": host, "shards_done": done} for worker_id, host, done in rows]
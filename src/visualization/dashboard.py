@@ -1,9 +1,7 @@
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from collections import Counter
 import re
-import pandas as pd
 from src.config.constants import CUSTOM_COLORS, STOP_WORDS
+from src.utils.preprocessing import count_words_by_label, tokenize
 
 def get_top_words(texts, n=5, min_length=2):
     """Get top words from texts"""
@@ -12,10 +10,67 @@ def get_top_words(texts, n=5, min_length=2):
     words = [w for w in words if len(w) >= min_length and w not in STOP_WORDS]
     return Counter(words).most_common(n)
 
+class DashboardAggregates:
+    """Running label counts, text length sums and word counts per label
+
+    Updated batch by batch during classification so the dashboard can be
+    drawn at any point without scanning the results again.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.length_sums = Counter()
+        self.length_counts = Counter()
+        self.words = {}
+
+    def update(self, texts, labels):
+        """Add one batch of texts and their labels"""
+        for text, label in zip(texts, labels):
+            self.counts[label] += 1
+            if isinstance(text, str):
+                self.length_sums[label] += len(text)
+                self.length_counts[label] += 1
+            self.words.setdefault(label, Counter()).update(tokenize(text))
+
+    @classmethod
+    def from_dataframe(cls, df, text_column):
+        """Aggregates of a finished result table, e.g. one loaded from disk"""
+        aggregates = cls()
+        texts, labels = df[text_column].tolist(), df['classification'].tolist()
+        for text, label in zip(texts, labels):
+            aggregates.counts[label] += 1
+            if isinstance(text, str):
+                aggregates.length_sums[label] += len(text)
+                aggregates.length_counts[label] += 1
+        # Word counting dominates; large frames are counted across worker processes
+        aggregates.words = count_words_by_label(texts, labels)
+        return aggregates
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def mean_lengths(self):
+        """{label: mean text length}, sorted by label"""
+        return {
+            label: round(self.length_sums[label] / self.length_counts[label], 1)
+            for label in sorted(self.length_counts, key=str)
+        }
+
+    def top_words(self, label, n=5):
+        return self.words.get(label, Counter()).most_common(n)
+
 def create_dashboard(df):
     """Create a comprehensive dashboard of classification results"""
     text_column = 'text' if 'text' in df.columns else df.columns[0]
-    
+    return build_dashboard(DashboardAggregates.from_dataframe(df, text_column))
+
+def build_dashboard(aggregates):
+    """Draw the dashboard from running aggregates"""
+    # Plotting libraries are only needed once there are results to draw
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     fig = make_subplots(
         rows=1, cols=3,
         subplot_titles=(
@@ -28,14 +83,14 @@ def create_dashboard(df):
     )
 
     # Pie Chart
-    counts = df['classification'].value_counts()
-    percentages = (counts / len(df) * 100).round(1)
-    labels = [f"{cat}<br>({pct}%)" for cat, pct in zip(counts.index, percentages)]
+    counts = aggregates.counts.most_common()
+    total = aggregates.total
+    labels = [f"{cat}<br>({round(count / total * 100, 1)}%)" for cat, count in counts]
     
     fig.add_trace(
         go.Pie(
             labels=labels,
-            values=counts.values,
+            values=[count for _, count in counts],
             hole=0.4,
             marker=dict(colors=CUSTOM_COLORS),
             textinfo='label',
@@ -48,14 +103,14 @@ def create_dashboard(df):
     )
 
     # Text Length Bar Chart
-    avg_lengths = df.groupby('classification')[text_column].apply(lambda x: x.str.len().mean()).round(1)
+    avg_lengths = aggregates.mean_lengths()
     
     fig.add_trace(
         go.Bar(
-            x=avg_lengths.index,
-            y=avg_lengths.values,
+            x=list(avg_lengths.keys()),
+            y=list(avg_lengths.values()),
             marker_color=CUSTOM_COLORS[:len(avg_lengths)],
-            text=avg_lengths.values,
+            text=list(avg_lengths.values()),
             textposition='auto',
             textfont=dict(size=14, family="Noto Kufi Arabic"),
             hovertemplate="<b>%{x}</b><br>متوسط الطول: %{y:.1f} حرف<extra></extra>",
@@ -65,42 +120,23 @@ def create_dashboard(df):
     )
 
     # Word Frequency Chart
-    word_data = []
-    categories = df['classification'].unique()
-    
-    if len(categories) > 0:
-        for idx, category in enumerate(categories):
-            category_texts = df[df['classification'] == category][text_column]
-            if not category_texts.empty:
-                top_words = get_top_words(category_texts)
-                for word, count in top_words:
-                    word_data.append({
-                        'category': str(category),
-                        'word': word,
-                        'count': count,
-                        'color': CUSTOM_COLORS[idx % len(CUSTOM_COLORS)]
-                    })
-
-    word_df = pd.DataFrame(word_data)
-    
-    if not word_df.empty:
-        for idx, category in enumerate(categories):
-            category_words = word_df[word_df['category'] == str(category)]
-            if not category_words.empty:
-                category_words = category_words.sort_values('count', ascending=True)
-                fig.add_trace(
-                    go.Bar(
-                        name=str(category),
-                        x=category_words['count'],
-                        y=category_words['word'],
-                        marker_color=category_words['color'].tolist(),
-                        textfont=dict(size=14, family="Noto Kufi Arabic"),
-                        hovertemplate="<b>%{y}</b><br>التكرار: %{x}<br>الفئة: " + str(category) + "<extra></extra>",
-                        orientation='h',
-                        showlegend=False
-                    ),
-                    row=1, col=3
-                )
+    for idx, category in enumerate(aggregates.counts):
+        # Least frequent first so the most frequent word is drawn on top
+        top_words = sorted(aggregates.top_words(category), key=lambda item: item[1])
+        if top_words:
+            fig.add_trace(
+                go.Bar(
+                    name=str(category),
+                    x=[count for _, count in top_words],
+                    y=[word for word, _ in top_words],
+                    marker_color=CUSTOM_COLORS[idx % len(CUSTOM_COLORS)],
+                    textfont=dict(size=14, family="Noto Kufi Arabic"),
+                    hovertemplate="<b>%{y}</b><br>التكرار: %{x}<br>الفئة: " + str(category) + "<extra></extra>",
+                    orientation='h',
+                    showlegend=False
+                ),
+                row=1, col=3
+            )
 
     # Update layout
     fig.update_layout(
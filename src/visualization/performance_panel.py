@@ -0,0 +1,57 @@
+"""
+Sidebar panel for model-call performance metrics
+"""
+import streamlit as st
+from src.utils.circuit_breaker import BREAKER, CLOSED, OPEN
+
+def render_metrics_panel(collector, slot=None, downloads=True, key="metrics_panel"):
+    """Show aggregated model-call metrics, optionally inside a placeholder
+
+    The panel may be drawn more than once per run (before and after a job);
+    each draw with downloads needs its own key.
+    """
+    summary = collector.summary()
+    if not summary["calls"] and not summary["cache_hits"]:
+        if slot is not None:
+            slot.empty()
+        return
+
+    target = slot if slot is not None else st.sidebar
+    with target.container():
+        st.markdown("### ⚡ أداء النموذج")
+        col1, col2 = st.columns(2)
+        col1.metric("الطلبات", f"{summary['calls']:,}")
+        col2.metric("الأخطاء", f"{summary['errors']:,}")
+        col1.metric("زمن p50", f"{summary['latency_s']['p50']:.2f} ث")
+        col2.metric("زمن p95", f"{summary['latency_s']['p95']:.2f} ث")
+        col1.metric("نص/ثانية", f"{summary['throughput_texts_s']:.1f}")
+        col2.metric("متوسط الدفعة", f"{summary['mean_batch_size']:.1f}")
+        st.caption(
+            f"إعادة المحاولة: {summary['retries']:,} | فشل التحليل: {summary['parse_failures']:,} | "
+            f"من الذاكرة: {summary['cache_hits']:,} | طلبات احتياطية: {summary['hedges']:,} | "
+            f"p99: {summary['latency_s']['p99']:.2f} ث"
+        )
+        breaker = BREAKER.stats()
+        if breaker["state"] != CLOSED:
+            st.warning(
+                f"⛔ قاطع الدائرة {'مفتوح' if breaker['state'] == OPEN else 'في وضع الاختبار'}: "
+                f"تُرفض الطلبات فوراً حتى تتعافى خدمة النموذج ({breaker['rejected']:,} طلب مرفوض)"
+            )
+
+        if downloads:
+            st.download_button(
+                label="📥 تصدير JSON",
+                data=collector.to_json().encode("utf-8"),
+                file_name="model_metrics.json",
+                mime="application/json",
+                use_container_width=True,
+                key=f"{key}_json"
+            )
+            st.download_button(
+                label="📥 تصدير Prometheus",
+                data=collector.to_prometheus().encode("utf-8"),
+                file_name="model_metrics.prom",
+                mime="text/plain",
+                use_container_width=True,
+                key=f"{key}_prometheus"
+            )
@@ -0,0 +1,142 @@
+"""
+Paginated results table; filtering, sorting and slicing run on the server
+"""
+import math
+import streamlit as st
+from src.config.constants import TABLE_PAGE_SIZES
+
+# Sort keys shown to the user; "row" keeps the original order
+SORT_OPTIONS = {"row": "الترتيب الأصلي", "label": "الفئة", "text": "النص"}
+
+class DataFrameSource:
+    """Table source over an in-memory results DataFrame"""
+
+    def __init__(self, df, text_column="text", label_column="classification"):
+        self.df = df
+        self.text_column = text_column if text_column in df.columns else df.columns[0]
+        self.label_column = label_column if label_column in df.columns else None
+        self._cache = None
+
+    def labels(self):
+        if self.label_column is None:
+            return []
+        column = self.df[self.label_column]
+        if hasattr(column, "cat"):
+            return [label for label in column.cat.categories]
+        return sorted(column.dropna().astype(str).unique().tolist())
+
+    def _positions(self, labels, search, sort_by, ascending):
+        """Row positions after filtering and sorting, cached for the last query"""
+        query = (id(self.df), tuple(labels), search, sort_by, ascending)
+        if self._cache is not None and self._cache[0] == query:
+            return self._cache[1]
+
+        import numpy as np
+
+        df = self.df
+        column = {"label": self.label_column, "text": self.text_column}.get(sort_by)
+        if not labels and not search and column is None and ascending:
+            positions = None
+        else:
+            positions = np.arange(len(df))
+            if labels and self.label_column is not None:
+                positions = positions[df[self.label_column].astype(str).isin(labels).to_numpy()]
+            if search:
+                texts = df[self.text_column].iloc[positions].astype(str)
+                positions = positions[texts.str.contains(search, regex=False, na=False).to_numpy()]
+            if column is not None:
+                keys = df[column].iloc[positions].astype(str).reset_index(drop=True)
+                positions = positions[keys.sort_values(ascending=ascending, kind="stable").index.to_numpy()]
+            elif not ascending:
+                positions = positions[::-1]
+
+        self._cache = (query, positions)
+        return positions
+
+    def count(self, labels, search, sort_by, ascending):
+        positions = self._positions(labels, search, sort_by, ascending)
+        return len(self.df) if positions is None else len(positions)
+
+    def page(self, labels, search, sort_by, ascending, offset, limit):
+        positions = self._positions(labels, search, sort_by, ascending)
+        if positions is None:
+            return self.df.iloc[offset:offset + limit]
+        return self.df.iloc[positions[offset:offset + limit]]
+
+class RunSource:
+    """Table source over a stored run in the results database"""
+
+    def __init__(self, run):
+        self.run = run
+
+    def labels(self):
+        return list(self.run["categories"])
+
+    def count(self, labels, search, sort_by, ascending):
+        from src.utils.results_db import label_counts
+        return sum(label_counts(self.run["run_id"], labels, search).values())
+
+    def page(self, labels, search, sort_by, ascending, offset, limit):
+        from src.utils.results_db import load_results
+        return load_results(self.run["run_id"], labels, search, limit=limit, offset=offset,
+                            order_by=sort_by, ascending=ascending)
+
+def get_source(key, factory, *identity):
+    """Reuse a source (and its cached filter result) across reruns while identity is unchanged"""
+    state_key = f"{key}_source"
+    cached = st.session_state.get(state_key)
+    if cached is None or cached[0] != identity:
+        cached = (identity, factory())
+        st.session_state[state_key] = cached
+    return cached[1]
+
+def render_results_table(source, key, page_sizes=TABLE_PAGE_SIZES):
+    """Filter controls, the current page of rows and page navigation
+
+    Only the visible page is sent to the browser.
+    """
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        labels = st.multiselect("تصفية حسب الفئة:", source.labels(), key=f"{key}_labels")
+    with col2:
+        search = st.text_input("بحث في النصوص:", key=f"{key}_search").strip()
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort_by = st.selectbox("الترتيب حسب:", list(SORT_OPTIONS), format_func=SORT_OPTIONS.get, key=f"{key}_sort")
+    with col2:
+        ascending = st.selectbox("الاتجاه:", [True, False], format_func=lambda asc: "تصاعدي" if asc else "تنازلي",
+                                 key=f"{key}_ascending")
+    with col3:
+        page_size = st.selectbox("صفوف الصفحة:", page_sizes, key=f"{key}_page_size")
+
+    # A new query starts again from the first page
+    query = (tuple(labels), search, sort_by, ascending, page_size)
+    if st.session_state.get(f"{key}_query") != query:
+        st.session_state[f"{key}_query"] = query
+        st.session_state[f"{key}_page"] = 1
+
+    total = source.count(labels, search, sort_by, ascending)
+    pages = max(1, math.ceil(total / page_size))
+    st.session_state[f"{key}_page"] = min(st.session_state.get(f"{key}_page", 1), pages)
+
+    page = st.session_state[f"{key}_page"]
+    rows = source.page(labels, search, sort_by, ascending, (page - 1) * page_size, page_size)
+    st.dataframe(rows, use_container_width=True)
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("→ السابق", key=f"{key}_prev", disabled=page <= 1, use_container_width=True,
+                  on_click=_move_page, args=(key, -1, pages))
+    with col2:
+        st.markdown(
+            f"<div style='text-align: center;'>صفحة {page:,} من {pages:,} | {total:,} صف</div>",
+            unsafe_allow_html=True
+        )
+    with col3:
+        st.button("التالي ←", key=f"{key}_next", disabled=page >= pages, use_container_width=True,
+                  on_click=_move_page, args=(key, 1, pages))
+    return total
+
+def _move_page(key, step, pages):
+    st.session_state[f"{key}_page"] = max(1, min(pages, st.session_state.get(f"{key}_page", 1) + step))